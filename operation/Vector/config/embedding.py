@@ -1,36 +1,201 @@
 import faiss
+import hashlib
 import json
 import os
+import time
+import numpy as np
 from tqdm import tqdm
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, Optional, Set
 import boto3
 
+from .index import build_index, train_size, supports_remove
+from .metadata_store import METADATA_FILES, MetadataSpool
+
+
+def chunk_hash(chunk: Dict) -> int:
+    """document / chunk_id / 내용으로 만든 안정적인 63bit 해시 ID (FAISS int64 ID로 사용)."""
+    key = "\x1f".join([
+        str(chunk.get("document", "")),
+        str(chunk.get("chunk_id", "")),
+        chunk.get("text", "").strip()
+    ])
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & 0x7FFFFFFFFFFFFFFF
+
 
 class Embedder:
-    def __init__(self, model_name: str = "dragonkue/snowflake-arctic-embed-l-v2.0-ko", dim: int = 1024):
+    def __init__(
+            self,
+            model_name: str = "dragonkue/snowflake-arctic-embed-l-v2.0-ko",
+            dim: int = 1024,
+            index_type: str = "flat",
+            **index_kwargs
+    ):
+        self.model_name = model_name
         self.model = SentenceTransformer(model_name)
-        self.index = faiss.IndexFlatL2(dim)  # Cosine similarity는 normalize 필요
-        self.metadata = []
+        # 정규화된 벡터 + inner product = cosine similarity, chunk 해시 ID로 매핑
+        self.index_type = index_type
+        self.dim = dim
+        self.index_kwargs = index_kwargs
+        self.index = build_index(dim, index_type, **index_kwargs)
+        # chunk 메타데이터는 디스크(spool)에 두고 메모리에는 ID/source만 유지
+        self.metadata = MetadataSpool()
+        self.objects = {}  # 임베딩된 MinIO 객체 key → ETag
+        self._pending = []  # IVF 학습 전까지 보류 중인 (벡터, ID) 블록
+
+
+    def add_documents(self, chunks: Iterable[Dict], batch_size: int = 64, block_size: int = 4096) -> int:
+        """
+        chunk를 스트리밍으로 받아 배치 단위로 임베딩하여 인덱스에 추가합니다.
+        block_size 개씩 모이면 길이순으로 정렬 후 batch_size 단위로 인코딩하고(패딩 최소화),
+        L2 정규화된 float32 블록을 원래 순서대로 FAISS에 한 번에 추가합니다.
+        chunks가 다운로드 중인 제너레이터여도 되며, 원본 chunk는 한 블록 분량만 메모리에 유지됩니다.
+        임베딩된 블록의 메타데이터는 바로 디스크 spool에 쓰이므로 텍스트는 코퍼스 크기만큼 쌓이지 않습니다.
+        추가된 chunk 수를 반환합니다.
+        """
+        start = time.perf_counter()
+        added = 0
+        block, block_ids = [], set()
+        with tqdm(desc="임베딩 및 인덱스에 추가 중", unit="chunk") as pbar:
+            for chunk in chunks:
+                text = chunk.get("text", "").strip()
+                if not text:
+                    continue
+
+                chunk_id = chunk_hash(chunk)
+                if chunk_id in self.metadata or chunk_id in block_ids:  # 이미 임베딩된(동일 내용) chunk
+                    continue
+                block_ids.add(chunk_id)
+
+                block.append({
+                    "id": chunk_id,
+                    "title" : chunk.get("title", ""),
+                    "text" : text,
+                    "chunk_id": chunk.get("chunk_id", ""),
+                    "document": chunk.get("document", ""),
+                    "source": chunk.get("source", "")
+                })
+                if len(block) >= block_size:
+                    self._add_block(block, batch_size)
+                    added += len(block)
+                    pbar.update(len(block))
+                    block, block_ids = [], set()
+
+            if block:
+                self._add_block(block, batch_size)
+                added += len(block)
+                pbar.update(len(block))
+        self._flush_pending(force=True)
+
+        if not added:
+            print("임베딩할 chunk가 없습니다.")
+            return 0
+
+        elapsed = time.perf_counter() - start
+        print(f"임베딩 완료: {added}개 chunk, {elapsed:.1f}초 ({added / max(elapsed, 1e-9):.1f} chunks/sec)")
+        return added
+
+    def _add_block(self, block: List[Dict], batch_size: int):
+        vectors = self.encode([record["text"] for record in block], batch_size=batch_size)
+        ids = np.array([record["id"] for record in block], dtype="int64")
+        self._add_vectors(vectors, ids)  # FAISS에 블록 단위로 추가
+        self.metadata.append(block)
+
+    def update_documents(self, chunks: Iterable[Dict], sources: Optional[Iterable[str]] = None,
+                         keep_sources: Optional[Set[str]] = None, **kwargs):
+        """
+        증분 업데이트: 새로 들어온 chunk 중 해시 ID가 없는 것만 임베딩하고,
+        sources(갱신/삭제된 MinIO 객체 key)에 속하지만 더 이상 존재하지 않는 chunk는 인덱스에서 제거합니다.
+        sources가 None이면 chunks를 전체 코퍼스로 보고 나머지를 모두 제거합니다.
+        chunks는 스트리밍으로 한 번만 순회하며, 삭제 대상은 순회가 끝난 뒤 계산합니다.
+        keep_sources(다운로드 실패 객체 등, 순회 중에 채워져도 됨)에 속한 기존 chunk는 삭제하지 않습니다.
+        """
+        incoming = set()
+        sources = set(sources) if sources is not None else None
+        keep_sources = keep_sources if keep_sources is not None else set()
+
+        def track(stream: Iterable[Dict]) -> Iterator[Dict]:
+            for chunk in stream:
+                if chunk.get("text", "").strip():
+                    incoming.add(chunk_hash(chunk))
+                yield chunk
+
+        new_count = self.add_documents(track(chunks), **kwargs)
+
+        stale = [
+            chunk_id for chunk_id, source in self.metadata.sources()
+            if chunk_id not in incoming
+            and (sources is None or source in sources)
+            and source not in keep_sources
+        ]
+        if stale:
+            self.remove_ids(stale)
+
+        print(f"증분 업데이트: 추가 {new_count}개, 삭제 {len(stale)}개, 유지 {len(self.metadata) - new_count}개")
+
+    def remove_ids(self, ids: List[int]):
+        if not supports_remove(self.index):
+            raise RuntimeError(f"{self.index_type} 인덱스는 삭제를 지원하지 않습니다. 전체 재생성이 필요합니다.")
+
+        self.index.remove_ids(np.array(ids, dtype="int64"))
+        self.metadata.remove(ids)
 
+    def _add_vectors(self, vectors: np.ndarray, ids: np.ndarray):
+        if self.index.is_trained:
+            self.index.add_with_ids(vectors, ids)
+            return
+        self._pending.append((vectors, ids))
+        self._flush_pending()
 
-    def add_documents(self, chunks: List[Dict]):
-        for chunk in tqdm(chunks, desc="임베딩 및 인덱스에 추가 중"):
-            text = chunk.get("text", "").strip()
-            if not text:
-                continue
+    def _flush_pending(self, force: bool = False):
+        """IVF 계열 인덱스는 학습에 충분한 벡터가 모이면(또는 force) centroid를 학습한 뒤 한 번에 추가합니다."""
+        if not self._pending:
+            return
 
-            # 벡터 임베딩
-            vector = self.model.encode([text])  # shape: (1, dim)
-            self.index.add(vector)  # FAISS에 추가
+        pending_count = sum(len(v) for v, _ in self._pending)
+        if not force and pending_count < train_size(self.index):
+            return
 
-            self.metadata.append({
-                "title" : chunk.get("title", ""),
-                "text" : text,
-                "chunk_id": chunk.get("chunk_id", ""),
-                "document": chunk.get("document", ""),
-                "source": chunk.get("source", "")
-            })
+        vectors = np.concatenate([v for v, _ in self._pending])
+        ids = np.concatenate([i for _, i in self._pending])
+        self._pending = []
+        if not self.index.is_trained and len(vectors) < train_size(self.index):
+            self._shrink_index(len(vectors))
+        if not self.index.is_trained:
+            print(f"인덱스 학습 중: {len(vectors)}개 벡터")
+            self.index.train(vectors)
+        self.index.add_with_ids(vectors, ids)
+
+    def _shrink_index(self, count: int):
+        """
+        코퍼스가 IVF 학습 최소치보다 작을 때 nlist를 벡터 수에 맞게 줄여 인덱스를 다시 만듭니다.
+        PQ 코드북(2^pq_bits개 centroid)도 학습할 수 없을 만큼 작으면 Flat 인덱스를 사용합니다.
+        """
+        nlist = max(1, count // 39)
+        if self.index_type == "ivf_pq" and count < 2 ** self.index_kwargs.get("pq_bits", 8):
+            print(f"벡터 {count}개로는 PQ 학습이 불가해 Flat 인덱스를 사용합니다.")
+            # 매니페스트(embedded.json / 업로드 manifest)가 실제 인덱스 타입을 기록하도록 함께 변경
+            self.index_type, self.index_kwargs = "flat", {}
+        else:
+            print(f"벡터 {count}개가 학습 최소치보다 적어 nlist를 {nlist}(으)로 줄입니다.")
+            self.index_kwargs = {**self.index_kwargs, "nlist": nlist}
+        self.index = build_index(self.dim, self.index_type, **self.index_kwargs)
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """텍스트 길이순으로 정렬해 배치 인코딩한 뒤 원래 순서의 정규화된 float32 행렬을 반환합니다."""
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        sorted_vectors = self.model.encode(
+            [texts[i] for i in order],
+            batch_size=batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+
+        vectors = np.empty_like(sorted_vectors, dtype="float32")
+        vectors[order] = sorted_vectors
+        return np.ascontiguousarray(vectors)
 
     def save(self, save_dir: str):
         os.makedirs(save_dir, exist_ok=True)
@@ -38,12 +203,44 @@ class Embedder:
         # FAISS index 저장
         faiss.write_index(self.index, os.path.join(save_dir, "vector.index"))
 
-        # 메타데이터 저장
-        with open(os.path.join(save_dir, "metadata.json"), "w", encoding="utf-8") as f:
-            json.dump(self.metadata, f, ensure_ascii=False, indent=2)
+        # 메타데이터 저장 (서빙에서 mmap으로 읽는 blob + offsets 포맷, spool에서 ID 순으로 스트리밍)
+        self.metadata.write(save_dir)
+
+        # 증분 업데이트용 매니페스트 저장
+        with open(os.path.join(save_dir, "embedded.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "model": self.model_name,
+                "index_type": self.index_type,
+                "count": len(self.metadata),
+                "objects": self.objects
+            }, f, ensure_ascii=False, indent=2)
 
         print(f"벡터 인덱스 및 메타데이터 저장 완료 → {save_dir}")
 
+    def load(self, save_dir: str) -> bool:
+        """이전에 저장한 인덱스/메타데이터/매니페스트를 불러옵니다. 없거나 모델이 다르면 False."""
+        manifest_path = os.path.join(save_dir, "embedded.json")
+        if not os.path.exists(manifest_path):
+            return False
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("model") != self.model_name or manifest.get("index_type") != self.index_type:
+            print(f"매니페스트의 모델/인덱스 설정이 달라 전체 재생성합니다: {manifest.get('model')}, {manifest.get('index_type')}")
+            return False
+
+        self.index = faiss.read_index(os.path.join(save_dir, "vector.index"))
+        self.metadata = MetadataSpool()
+        self.metadata.attach(save_dir)
+        self.objects = manifest.get("objects", {})
+
+        print(f"기존 인덱스 로드: {len(self.metadata)}개 chunk ← {save_dir}")
+        return True
+
+
+    def iter_metadata(self, sources: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+        """저장된 chunk 메타데이터를 디스크에서 하나씩 읽습니다. (Meilisearch 동기화용)"""
+        return self.metadata.iter_records(sources)
 
     def upload_to_minio(
             self,
@@ -52,19 +249,74 @@ class Embedder:
             endpoint_url: str,
             access_key: str,
             secret_key: str,
-            directory: str = "C:/Users/dm_ohminchan/Model/operation/Vector/index/"  # 🔥 default directory
-    ):
+            directory: str = "C:/Users/dm_ohminchan/Model/operation/Vector/index/",  # 🔥 default directory
+            version: Optional[str] = None
+    ) -> str:
+        """
+        인덱스를 버전 단위로 업로드합니다.
+          {prefix}/versions/{version}/...           : 인덱스 파일들
+          {prefix}/versions/{version}/manifest.json : 버전 ID, 파일별 sha256/크기
+          {prefix}/latest.json                      : 현재/이전 버전 포인터 (마지막에 기록)
+        서빙 쪽 IndexRegistry가 latest.json을 보고 새 버전을 받아 교체합니다.
+        """
         s3 = boto3.client(
             "s3",
             endpoint_url=endpoint_url,
             aws_access_key_id=access_key,
             aws_secret_access_key=secret_key
         )
+        prefix = prefix.rstrip('/')
+        version = version or f"{time.strftime('%Y%m%d%H%M%S')}-{len(self.metadata)}"
 
-        for file_name in ["vector.index", "metadata.json"]:
+        files = {}
+        for file_name in ["vector.index", *METADATA_FILES]:
             file_path = os.path.join(directory, file_name)  # 디렉토리 경로 포함
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"파일이 존재하지 않음: {file_path}")
 
-            s3.upload_file(file_path, bucket, f"{prefix.rstrip('/')}/{file_name}")
-            print(f"벡터 데이터 업로드 완료: {file_name} → {bucket}/{prefix}")
\ No newline at end of file
+            files[file_name] = {"sha256": file_sha256(file_path), "size": os.path.getsize(file_path)}
+            s3.upload_file(file_path, bucket, f"{prefix}/versions/{version}/{file_name}")
+            print(f"벡터 데이터 업로드 완료: {file_name} → {bucket}/{prefix}/versions/{version}")
+
+        manifest = {
+            "version": version,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "model": self.model_name,
+            "index_type": self.index_type,
+            "count": len(self.metadata),
+            "files": files
+        }
+        s3.put_object(
+            Bucket=bucket,
+            Key=f"{prefix}/versions/{version}/manifest.json",
+            Body=json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"),
+            ContentType="application/json"
+        )
+
+        publish_version(s3, bucket, prefix, version)
+        return version
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def publish_version(s3, bucket: str, prefix: str, version: str):
+    """latest.json 포인터를 version으로 갱신합니다. 이전 버전으로 되돌릴 때도 사용합니다."""
+    pointer_key = f"{prefix.rstrip('/')}/latest.json"
+    try:
+        previous = json.loads(s3.get_object(Bucket=bucket, Key=pointer_key)["Body"].read()).get("version")
+    except s3.exceptions.NoSuchKey:
+        previous = None
+
+    s3.put_object(
+        Bucket=bucket,
+        Key=pointer_key,
+        Body=json.dumps({"version": version, "previous": previous}).encode("utf-8"),
+        ContentType="application/json"
+    )
+    print(f"인덱스 버전 게시: {previous} → {version}")
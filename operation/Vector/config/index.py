@@ -0,0 +1,147 @@
+import time
+import faiss
+import numpy as np
+from typing import Dict, List, Optional
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+
+def index_description(
+    index_type: str = "flat",
+    nlist: int = 1024,
+    pq_m: int = 64,
+    pq_bits: int = 8,
+    hnsw_m: int = 32
+) -> str:
+    """index_type을 faiss.index_factory 문자열로 변환합니다."""
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "ivf_flat":
+        return f"IVF{nlist},Flat"
+    if index_type == "ivf_pq":
+        return f"IVF{nlist},PQ{pq_m}x{pq_bits}"
+    if index_type == "hnsw":
+        return f"HNSW{hnsw_m},Flat"
+    raise ValueError(f"지원하지 않는 인덱스 타입: {index_type} (가능: {', '.join(INDEX_TYPES)})")
+
+
+def build_index(
+    dim: int = 1024,
+    index_type: str = "flat",
+    ef_construction: int = 200,
+    id_map: bool = True,
+    **kwargs
+) -> faiss.Index:
+    """
+    정규화된 벡터용 inner-product 인덱스를 생성합니다.
+    벡터가 L2 정규화되어 있으면 inner product == cosine similarity 입니다.
+    IVF 계열은 add 전에 train()이 필요합니다.
+    id_map=True면 IndexIDMap2로 감싸 chunk 해시 ID로 add_with_ids / remove_ids 할 수 있습니다.
+    """
+    description = index_description(index_type, **kwargs)
+    if id_map:
+        description = f"IDMap2,{description}"
+    index = faiss.index_factory(dim, description, faiss.METRIC_INNER_PRODUCT)
+
+    if index_type == "hnsw":
+        base_index(index).hnsw.efConstruction = ef_construction
+    return index
+
+
+def base_index(index: faiss.Index) -> faiss.Index:
+    """IndexIDMap 래퍼를 벗겨 실제 인덱스(HNSW, IVF 등)를 반환합니다."""
+    index = faiss.downcast_index(index)
+    if hasattr(index, "id_map"):
+        index = faiss.downcast_index(index.index)
+    return index
+
+
+def supports_remove(index: faiss.Index) -> bool:
+    """HNSW는 remove_ids를 지원하지 않아 삭제가 필요하면 전체 재생성해야 합니다."""
+    return not hasattr(base_index(index), "hnsw")
+
+
+def set_search_params(index: faiss.Index, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> faiss.Index:
+    """IVF의 nprobe, HNSW의 efSearch를 설정합니다. 해당하지 않는 인덱스 타입이면 무시합니다."""
+    if nprobe is not None:
+        try:
+            faiss.extract_index_ivf(index).nprobe = nprobe
+        except RuntimeError:
+            pass
+
+    if ef_search is not None:
+        base = base_index(index)
+        if hasattr(base, "hnsw"):
+            base.hnsw.efSearch = ef_search
+    return index
+
+
+def train_size(index: faiss.Index) -> int:
+    """IVF 학습에 필요한 최소 벡터 수 (centroid당 39개, faiss 권장치)."""
+    try:
+        return faiss.extract_index_ivf(index).nlist * 39
+    except RuntimeError:
+        return 0
+
+
+def evaluate_index(
+    index: faiss.Index,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    top_k: int = 10,
+    baseline: Optional[faiss.Index] = None
+) -> Dict[str, float]:
+    """
+    Flat-IP 기준 결과 대비 recall@k와 쿼리당 평균 지연시간(ms)을 측정합니다.
+    index는 vectors가 이미 추가된 상태여야 합니다.
+    """
+    if baseline is None:
+        baseline = faiss.IndexFlatIP(vectors.shape[1])
+        baseline.add(vectors)
+    _, truth = baseline.search(queries, top_k)
+
+    start = time.perf_counter()
+    for i in range(len(queries)):
+        index.search(queries[i:i + 1], top_k)  # 서빙과 동일하게 쿼리 1건씩 측정
+    latency_ms = (time.perf_counter() - start) * 1000 / max(len(queries), 1)
+
+    _, found = index.search(queries, top_k)
+    hits = sum(len(set(t[t >= 0]) & set(f[f >= 0])) for t, f in zip(truth, found))
+
+    return {
+        "recall": hits / max(truth.size, 1),
+        "latency_ms": latency_ms,
+    }
+
+
+def recall_latency_report(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    configs: List[Dict],
+    top_k: int = 10
+) -> List[Dict]:
+    """
+    여러 인덱스 설정을 같은 벡터로 생성해 Flat-IP 대비 recall/latency를 비교합니다.
+    configs 예: [{"index_type": "hnsw", "hnsw_m": 32, "ef_search": 64}, {"index_type": "ivf_flat", "nlist": 1024, "nprobe": 16}]
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    queries = np.ascontiguousarray(queries, dtype="float32")
+
+    baseline = faiss.IndexFlatIP(vectors.shape[1])
+    baseline.add(vectors)
+
+    report = []
+    for config in configs:
+        config = dict(config)
+        nprobe = config.pop("nprobe", None)
+        ef_search = config.pop("ef_search", None)
+
+        index = build_index(vectors.shape[1], id_map=False, **config)
+        if not index.is_trained:
+            index.train(vectors)
+        index.add(vectors)
+        set_search_params(index, nprobe=nprobe, ef_search=ef_search)
+
+        result = evaluate_index(index, vectors, queries, top_k=top_k, baseline=baseline)
+        report.append({**config, "nprobe": nprobe, "ef_search": ef_search, **result})
+    return report
@@ -0,0 +1,68 @@
+import meilisearch
+from itertools import islice
+from typing import Dict, Iterable, Optional
+
+# 서빙의 하이브리드 검색(BM25 + 벡터)에서 사용하는 필드
+SEARCHABLE_ATTRIBUTES = ["title", "text", "document"]
+FILTERABLE_ATTRIBUTES = ["source", "document", "title"]
+
+
+def sync_meilisearch(
+    records: Iterable[Dict],
+    url: str = "http://localhost:7700",
+    api_key: Optional[str] = None,
+    index_name: str = "chunks",
+    sources: Optional[Iterable[str]] = None,
+    batch_size: int = 1000,
+    filter_batch_size: int = 100
+):
+    """
+    Embedder가 저장한 chunk 메타데이터(id, title, text, document, source)를 Meilisearch 인덱스에 반영합니다.
+    FAISS와 같은 chunk 해시 ID를 primary key로 사용하므로 서빙에서 두 검색 결과를 ID로 합칠 수 있습니다.
+    sources가 None이면 인덱스를 비우고 records 전체를 다시 넣고,
+    있으면 해당 MinIO 객체(source)의 문서만 지운 뒤 그 source에 속한 records만 다시 넣습니다.
+    records는 제너레이터여도 되며 batch_size개씩 나눠 보냅니다.
+    source 삭제 필터는 filter_batch_size개씩 `source IN [...]`로 나눠 요청하므로 변경 객체가 많아도 필터 길이가 제한됩니다.
+    """
+    client = meilisearch.Client(url, api_key)
+    client.create_index(index_name, {"primaryKey": "id"})
+    index = client.index(index_name)
+    index.update_searchable_attributes(SEARCHABLE_ATTRIBUTES)
+    index.update_filterable_attributes(FILTERABLE_ATTRIBUTES)
+
+    if sources is None:
+        index.delete_all_documents()
+    else:
+        sources = set(sources)
+        if not sources:
+            return
+        records = (record for record in records if record.get("source") in sources)
+        ordered = sorted(sources)
+        for start in range(0, len(ordered), filter_batch_size):
+            values = ", ".join(_quote(source) for source in ordered[start:start + filter_batch_size])
+            index.delete_documents(filter=f"source IN [{values}]")
+
+    documents = (
+        {
+            "id": record["id"],
+            "title": record.get("title", ""),
+            "text": record.get("text", ""),
+            "chunk_id": record.get("chunk_id", ""),
+            "document": record.get("document", ""),
+            "source": record.get("source", "")
+        }
+        for record in records
+    )
+    count = 0
+    while True:
+        batch = list(islice(documents, batch_size))
+        if not batch:
+            break
+        index.add_documents(batch)
+        count += len(batch)
+    print(f"Meilisearch 색인 요청 완료: {count}개 chunk → {index_name}")
+
+
+def _quote(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
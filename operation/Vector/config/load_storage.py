@@ -1,60 +1,142 @@
 import boto3
 import json
-from typing import List, Dict, Union
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Set, Union, Optional, Iterable, Iterator, Callable
 from tqdm import tqdm
 
-def download_chunks_from_minio(
-    bucket: str = "chunk",
-    prefix: str = "data/",
+
+def create_client(
     endpoint_url: str = "http://localhost:9000",
     aws_access_key_id: str = "minio",
     aws_secret_access_key: str = "miniostorage",
-    extensions: Union[str, List[str]] = ".json"
-) -> List[Dict]:
-    """
-    MinIO에서 문서 chunk JSON을 다운로드하고, 각 chunk의 content와 메타정보를 추출합니다.
-    """
-    if isinstance(extensions, str):
-        extensions = [extensions]
-
-    s3 = boto3.client(
+    max_workers: int = 8
+):
+    # 동시 다운로드 수만큼 커넥션 풀 확보 (boto3 client는 스레드 간 공유 가능)
+    return boto3.client(
         "s3",
         endpoint_url=endpoint_url,
         aws_access_key_id=aws_access_key_id,
-        aws_secret_access_key=aws_secret_access_key
+        aws_secret_access_key=aws_secret_access_key,
+        config=Config(max_pool_connections=max(max_workers, 10))
     )
 
-    response = s3.list_objects_v2(Bucket=bucket, Prefix=prefix)
-    contents = response.get("Contents", [])
+
+def iter_objects(s3, bucket: str, prefix: str, extensions: Union[str, List[str]] = ".json") -> Iterator[Dict]:
+    """list_objects_v2를 페이지 단위로 끝까지 순회합니다. (한 번 호출은 최대 1000개에서 끊김)"""
+    if isinstance(extensions, str):
+        extensions = [extensions]
+
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            if any(obj["Key"].endswith(ext) for ext in extensions):
+                yield obj
+
+
+def bounded_map(func: Callable, items: Iterable, max_workers: int = 8, max_pending: Optional[int] = None) -> Iterator:
+    """
+    스레드풀로 func를 병렬 실행하고 끝나는 순서대로 결과를 내보냅니다.
+    동시에 대기하는 작업은 max_pending(기본 max_workers * 2)개로 제한해 결과가 메모리에 쌓이지 않게 합니다.
+    """
+    max_pending = max_pending or max_workers * 2
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="minio") as executor:
+        pending = set()
+        for item in items:
+            pending.add(executor.submit(func, item))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def parse_chunks(key: str, raw_data: str) -> List[Dict]:
+    """chunk JSON 하나에서 content와 메타정보를 추출합니다."""
+    json_data = json.loads(raw_data)
+
+    # 이중 리스트면 평탄화
+    if isinstance(json_data, list) and json_data and isinstance(json_data[0], list):
+        json_data = [chunk for sublist in json_data for chunk in sublist]
 
     result = []
-    for obj in tqdm(contents, desc="MinIO에서 파일 다운로드 중"):
-        key = obj["Key"]
-        if not any(key.endswith(ext) for ext in extensions):
-            continue
+    for chunk in json_data:
+        content = chunk.get("content", "").strip()
+        if content:
+            result.append({
+                "title" : chunk.get("title"),
+                "text": content,
+                "document": chunk.get("document", "unknown"),
+                "chunk_id": chunk.get("chunk_id", ""),
+                "source": key
+            })
+    return result
 
-        try:
-            s3_object = s3.get_object(Bucket=bucket, Key=key)
-            raw_data = s3_object["Body"].read().decode("utf-8")
-            json_data = json.loads(raw_data)
-
-            # 이중 리스트면 평탄화
-            if isinstance(json_data, list) and json_data and isinstance(json_data[0], list):
-                json_data = [chunk for sublist in json_data for chunk in sublist]
-
-            for chunk in json_data:
-                content = chunk.get("content", "").strip()
-                if content:
-                    result.append({
-                        "title" : chunk.get("title"),
-                        "text": content,
-                        "document": chunk.get("document", "unknown"),
-                        "chunk_id": chunk.get("chunk_id", ""),
-                        "source": key
-                    })
 
+def list_chunk_objects(
+    bucket: str = "chunk",
+    prefix: str = "data/",
+    endpoint_url: str = "http://localhost:9000",
+    aws_access_key_id: str = "minio",
+    aws_secret_access_key: str = "miniostorage",
+    extensions: Union[str, List[str]] = ".json"
+) -> Dict[str, str]:
+    """
+    MinIO의 chunk JSON 객체 목록을 {key: ETag} 형태로 반환합니다. (증분 업데이트 변경 감지용)
+    """
+    s3 = create_client(endpoint_url, aws_access_key_id, aws_secret_access_key)
+    return {
+        obj["Key"]: obj["ETag"].strip('"')
+        for obj in iter_objects(s3, bucket, prefix, extensions)
+    }
+
+
+def iter_chunks_from_minio(
+    bucket: str = "chunk",
+    prefix: str = "data/",
+    endpoint_url: str = "http://localhost:9000",
+    aws_access_key_id: str = "minio",
+    aws_secret_access_key: str = "miniostorage",
+    extensions: Union[str, List[str]] = ".json",
+    keys: Optional[Iterable[str]] = None,
+    max_workers: int = 8,
+    failed: Optional[Set[str]] = None
+) -> Iterator[Dict]:
+    """
+    MinIO에서 문서 chunk JSON을 병렬로 다운로드하면서 chunk를 하나씩 내보냅니다.
+    keys가 주어지면 해당 객체만 다운로드합니다. 다운로드가 진행되는 동안 소비자(Embedder)가 바로 임베딩할 수 있고,
+    메모리에는 진행 중인 객체 몇 개만 유지됩니다.
+    failed가 주어지면 읽기에 실패한 객체 key를 담습니다. (호출 측이 기존 chunk를 지우지 않고 다음 실행에 재시도하도록)
+    """
+    s3 = create_client(endpoint_url, aws_access_key_id, aws_secret_access_key, max_workers)
+    if keys is not None:
+        keys = set(keys)
+        object_keys = sorted(keys)  # 이미 목록을 알고 있으면 다시 나열하지 않음
+    else:
+        object_keys = (obj["Key"] for obj in iter_objects(s3, bucket, prefix, extensions))
+
+    def fetch(key: str) -> List[Dict]:
+        try:
+            raw_data = s3.get_object(Bucket=bucket, Key=key)["Body"].read().decode("utf-8")
+            return parse_chunks(key, raw_data)
         except Exception as e:
             print(f"{key} 읽기 실패: {e}")
+            if failed is not None:
+                failed.add(key)  # set.add는 스레드 간에 안전
+            return []
 
-    print(f"총 {len(result)}개의 chunk 수집 완료.")
-    return result
+    count = 0
+    with tqdm(total=len(keys) if keys is not None else None, desc="MinIO에서 파일 다운로드 중") as pbar:
+        for chunks in bounded_map(fetch, object_keys, max_workers):
+            pbar.update(1)
+            count += len(chunks)
+            yield from chunks
+
+    print(f"총 {count}개의 chunk 수집 완료.")
+
+
+def download_chunks_from_minio(*args, **kwargs) -> List[Dict]:
+    """iter_chunks_from_minio의 결과를 리스트로 모아 반환합니다."""
+    return list(iter_chunks_from_minio(*args, **kwargs))
@@ -0,0 +1,153 @@
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 메타데이터 저장 포맷
+#   metadata.bin          : chunk 메타데이터 JSON을 구분자 없이 이어 붙인 UTF-8 blob
+#   metadata.ids.npy      : 정렬된 chunk ID (int64)
+#   metadata.offsets.npy  : ids 순서에 맞춘 blob 내 시작 오프셋 (int64, 길이 N+1)
+# 서빙 쪽은 세 파일을 mmap으로 열어 필요한 행만 읽습니다.
+METADATA_BLOB = "metadata.bin"
+METADATA_IDS = "metadata.ids.npy"
+METADATA_OFFSETS = "metadata.offsets.npy"
+METADATA_FILES = [METADATA_BLOB, METADATA_IDS, METADATA_OFFSETS]
+
+
+def write_metadata_store(records: List[Dict], save_dir: str):
+    """chunk ID 순으로 정렬해 blob + offsets 포맷으로 저장합니다."""
+    records = sorted(records, key=lambda record: record["id"])
+    ids = np.array([record["id"] for record in records], dtype="int64")
+    offsets = np.zeros(len(records) + 1, dtype="int64")
+
+    with open(os.path.join(save_dir, METADATA_BLOB), "wb") as f:
+        for i, record in enumerate(records):
+            data = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            f.write(data)
+            offsets[i + 1] = offsets[i] + len(data)
+
+    np.save(os.path.join(save_dir, METADATA_IDS), ids)
+    np.save(os.path.join(save_dir, METADATA_OFFSETS), offsets)
+
+
+def read_metadata_store(save_dir: str) -> Iterator[Dict]:
+    """저장된 메타데이터를 ID 순서대로 모두 읽습니다. (증분 업데이트용)"""
+    offsets = np.load(os.path.join(save_dir, METADATA_OFFSETS), mmap_mode="r")
+    with open(os.path.join(save_dir, METADATA_BLOB), "rb") as f:
+        for i in range(len(offsets) - 1):
+            yield json.loads(f.read(int(offsets[i + 1] - offsets[i])))
+
+
+class MetadataSpool:
+    """
+    임베딩 중인 chunk 메타데이터를 디스크에 이어 쓰고, 메모리에는 ID별 (source, 파일 번호, 오프셋, 길이)만 유지합니다.
+    기존 저장소(load)의 blob과 새로 임베딩한 블록을 쓴 임시 spool 파일을 함께 참조하다가
+    write()에서 ID 순으로 다시 읽어 서빙용 blob + offsets 포맷으로 씁니다.
+    메모리 사용량은 chunk 텍스트가 아니라 chunk 수(ID/source)에만 비례합니다.
+    """
+
+    def __init__(self):
+        self._files: List[str] = []                 # 파일 번호 → 경로
+        self._readers: Dict[int, BinaryIO] = {}
+        self._entries: Dict[int, Tuple[str, int, int, int]] = {}
+        self._source_names: Dict[str, str] = {}     # 같은 source 문자열을 chunk마다 따로 보관하지 않도록 공유
+        self._spool_dir: Optional[str] = None
+        self._spool: Optional[BinaryIO] = None
+        self._spool_no = -1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, chunk_id: int) -> bool:
+        return chunk_id in self._entries
+
+    def _source(self, source: str) -> str:
+        return self._source_names.setdefault(source, source)
+
+    def attach(self, save_dir: str):
+        """저장된 blob + offsets를 참조로 등록합니다. 레코드는 source를 읽기 위해 한 번만 순회합니다."""
+        ids = np.load(os.path.join(save_dir, METADATA_IDS), mmap_mode="r")
+        offsets = np.load(os.path.join(save_dir, METADATA_OFFSETS), mmap_mode="r")
+        file_no = len(self._files)
+        self._files.append(os.path.join(save_dir, METADATA_BLOB))
+        for i, record in enumerate(read_metadata_store(save_dir)):
+            start, end = int(offsets[i]), int(offsets[i + 1])
+            self._entries[int(ids[i])] = (self._source(record.get("source", "")), file_no, start, end - start)
+
+    def append(self, records: Iterable[Dict]):
+        """임베딩이 끝난 블록의 메타데이터를 spool 파일에 씁니다."""
+        if self._spool is None:
+            self._spool_dir = tempfile.mkdtemp(prefix="metadata-spool-")
+            self._files.append(os.path.join(self._spool_dir, METADATA_BLOB))
+            self._spool = open(self._files[-1], "wb")
+            self._spool_no = len(self._files) - 1
+        file_no = self._spool_no
+        for record in records:
+            data = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            offset = self._spool.tell()
+            self._spool.write(data)
+            self._entries[record["id"]] = (self._source(record.get("source", "")), file_no, offset, len(data))
+        self._spool.flush()
+
+    def remove(self, ids: Iterable[int]):
+        for chunk_id in ids:
+            self._entries.pop(chunk_id, None)
+
+    def sources(self) -> Iterator[Tuple[int, str]]:
+        """(chunk ID, source) 목록. 삭제 대상 계산용으로 텍스트를 읽지 않습니다."""
+        for chunk_id, (source, _, _, _) in self._entries.items():
+            yield chunk_id, source
+
+    def _read(self, file_no: int, offset: int, length: int) -> bytes:
+        reader = self._readers.get(file_no)
+        if reader is None:
+            reader = self._readers[file_no] = open(self._files[file_no], "rb")
+        reader.seek(offset)
+        return reader.read(length)
+
+    def iter_records(self, sources: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+        """ID 순서로 레코드를 하나씩 읽습니다. sources가 있으면 해당 source의 레코드만."""
+        sources = set(sources) if sources is not None else None
+        for chunk_id in sorted(self._entries):
+            source, file_no, offset, length = self._entries[chunk_id]
+            if sources is None or source in sources:
+                yield json.loads(self._read(file_no, offset, length))
+
+    def write(self, save_dir: str):
+        """
+        ID 순으로 blob + offsets를 씁니다. 임시 파일에 쓴 뒤 교체하므로 save_dir이 attach한 디렉토리여도 됩니다.
+        쓰고 나면 새 저장소만 참조하도록 spool을 정리합니다.
+        """
+        if self._spool is not None:
+            self._spool.flush()
+        ids = np.array(sorted(self._entries), dtype="int64")
+        offsets = np.zeros(len(ids) + 1, dtype="int64")
+        blob_path = os.path.join(save_dir, METADATA_BLOB)
+
+        entries = {}
+        with open(f"{blob_path}.tmp", "wb") as f:
+            for i, chunk_id in enumerate(ids):
+                source, file_no, offset, length = self._entries[int(chunk_id)]
+                f.write(self._read(file_no, offset, length))
+                offsets[i + 1] = offsets[i] + length
+                entries[int(chunk_id)] = (source, 0, int(offsets[i]), length)
+
+        self.close()
+        os.replace(f"{blob_path}.tmp", blob_path)
+        np.save(os.path.join(save_dir, METADATA_IDS), ids)
+        np.save(os.path.join(save_dir, METADATA_OFFSETS), offsets)
+        self._files, self._entries = [blob_path], entries
+
+    def close(self):
+        """열린 파일을 닫고 spool 임시 디렉토리를 지웁니다."""
+        for reader in self._readers.values():
+            reader.close()
+        self._readers = {}
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        if self._spool_dir is not None:
+            shutil.rmtree(self._spool_dir, ignore_errors=True)
+            self._spool_dir = None
@@ -0,0 +1,55 @@
+import argparse
+import json
+import os
+import faiss
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from config.index import recall_latency_report, base_index
+
+DEFAULT_CONFIGS = [
+    {"index_type": "flat"},
+    {"index_type": "hnsw", "hnsw_m": 32, "ef_search": 32},
+    {"index_type": "hnsw", "hnsw_m": 32, "ef_search": 64},
+    {"index_type": "hnsw", "hnsw_m": 32, "ef_search": 128},
+    {"index_type": "ivf_flat", "nlist": 256, "nprobe": 8},
+    {"index_type": "ivf_flat", "nlist": 256, "nprobe": 32},
+    {"index_type": "ivf_pq", "nlist": 256, "pq_m": 64, "nprobe": 16},
+]
+
+
+def load_queries(qa_path: str, model_name: str, limit: int) -> np.ndarray:
+    with open(qa_path, "r", encoding="utf-8") as f:
+        questions = [qa["QUESTION"] for qa in json.load(f)][:limit]
+
+    model = SentenceTransformer(model_name)
+    return model.encode(questions, batch_size=64, normalize_embeddings=True, convert_to_numpy=True).astype("float32")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flat-IP 대비 ANN 인덱스 recall/latency 리포트")
+    parser.add_argument("--index-dir", default="index/", help="Flat 인덱스(vector.index)가 저장된 디렉토리")
+    parser.add_argument("--qa-path", default="../../data/instrcution/generation_QA_set_20250722.json")
+    parser.add_argument("--model", default="dragonkue/snowflake-arctic-embed-l-v2.0-ko")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    flat = faiss.read_index(os.path.join(args.index_dir, "vector.index"))
+    vectors = base_index(flat).reconstruct_n(0, flat.ntotal)
+    queries = load_queries(args.qa_path, args.model, args.queries)
+
+    # 코퍼스가 작으면 IVF nlist를 줄여 학습 가능하게 맞춤
+    max_nlist = max(1, flat.ntotal // 39)
+    configs = [{**c, "nlist": min(c["nlist"], max_nlist)} if "nlist" in c else c for c in DEFAULT_CONFIGS]
+
+    print(f"벡터 {flat.ntotal}개, 쿼리 {len(queries)}개, top_k={args.top_k}")
+    print(f"{'index':<10} {'params':<28} {'recall':>8} {'ms/query':>10}")
+    for row in recall_latency_report(vectors, queries, configs, top_k=args.top_k):
+        params = ", ".join(f"{k}={v}" for k, v in row.items()
+                           if k not in ("index_type", "recall", "latency_ms") and v is not None)
+        print(f"{row['index_type']:<10} {params:<28} {row['recall']:>8.4f} {row['latency_ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
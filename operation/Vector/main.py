@@ -1,18 +1,55 @@
-from config.load_storage import download_chunks_from_minio
+import argparse
+from config.load_storage import iter_chunks_from_minio, list_chunk_objects
 from config.embedding import Embedder
+from config.lexical import sync_meilisearch
+
+INDEX_DIR = "C:/Users/dm_ohminchan/Model/operation/Vector/index/"
 
 def main():
-    chunks = download_chunks_from_minio()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full", action="store_true", help="기존 인덱스를 무시하고 전체 재생성")
+    args = parser.parse_args()
+
+    embedder = Embedder()
+    incremental = not args.full and embedder.load(INDEX_DIR)
+
+    objects = list_chunk_objects()           # 1. 객체 목록 (key → ETag)
+    if incremental:
+        changed = {key for key, etag in objects.items() if embedder.objects.get(key) != etag}
+        deleted = set(embedder.objects) - set(objects)
+        if not changed and not deleted:
+            print("변경된 chunk가 없습니다.")
+            return
+    else:
+        changed, deleted = set(objects), set()
 
-    if not chunks:
-        print("임베딩할 chunk가 없습니다.")
+    # 2. 변경된 객체만 병렬 다운로드 → 3. 다운로드되는 대로 임베딩
+    failed = set()
+    chunks = iter_chunks_from_minio(keys=changed, failed=failed)
+
+    if incremental:
+        # 읽기 실패한 객체는 기존 chunk를 유지 (failed는 다운로드 중에 채워짐)
+        embedder.update_documents(chunks, sources=changed | deleted, keep_sources=failed)   # 증분 임베딩
+    elif not embedder.add_documents(chunks):                                             # 전체 임베딩
         return
 
-    embedder = Embedder()
-    embedder.add_documents(chunks)           # 3. 임베딩
-    embedder.save("C:/Users/dm_ohminchan/Model/operation/Vector/index/")                 # 4. 로컬 저장
+    # 실패한 객체는 이전 ETag를 유지(없으면 기록하지 않음)해 다음 실행에서 다시 변경으로 잡히게 함
+    if failed:
+        print(f"읽기 실패 {len(failed)}개 객체는 다음 실행에서 다시 시도합니다: {sorted(failed)}")
+    embedder.objects = {
+        key: (embedder.objects.get(key) if key in failed else etag)
+        for key, etag in objects.items()
+        if key not in failed or key in embedder.objects
+    }
+    embedder.save(INDEX_DIR)                 # 4. 로컬 저장
+
+    sources = ((changed | deleted) - failed) if incremental else None
+    sync_meilisearch(                        # 5. 하이브리드 검색용 BM25(Meilisearch) 색인
+        embedder.iter_metadata(sources),
+        sources=sources
+    )
 
-    embedder.upload_to_minio(                # 5. MinIO 업로드
+    embedder.upload_to_minio(                # 6. MinIO 업로드
         bucket="vector",
         prefix="index/faiss/",
         endpoint_url="http://localhost:9000",
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 임베딩 스크립트는 operation/Vector를 루트로 실행되므로(config.* import) 테스트도 같은 경로에서 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,71 @@
+import hashlib
+import json
+
+import faiss
+import numpy as np
+import pytest
+
+from config import embedding
+from config.embedding import Embedder
+
+DIM = 8
+
+
+class FakeModel:
+    """텍스트 해시로 정해지는 정규화 벡터를 돌려주는 SentenceTransformer 대역 (모델 다운로드 없이 인덱스 로직만 검증)."""
+
+    def __init__(self, model_name):
+        pass
+
+    def encode(self, texts, **kwargs):
+        vectors = np.stack([
+            np.random.RandomState(int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)).randn(DIM)
+            for text in texts
+        ]).astype("float32")
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture(autouse=True)
+def fake_model(monkeypatch):
+    monkeypatch.setattr(embedding, "SentenceTransformer", FakeModel)
+
+
+def chunks(count: int, source: str = "a.json"):
+    return [{"text": f"본문 {i}", "chunk_id": i, "document": "문서", "source": source} for i in range(count)]
+
+
+def test_small_corpus_falls_back_to_flat_for_pq(tmp_path):
+    embedder = Embedder(dim=DIM, index_type="ivf_pq", nlist=64, pq_m=2)
+    assert embedder.add_documents(chunks(50)) == 50
+
+    assert embedder.index_type == "flat"
+    assert faiss.downcast_index(embedder.index.index).__class__ is faiss.IndexFlat
+    assert embedder.index.ntotal == 50
+
+    embedder.save(str(tmp_path))
+    with open(tmp_path / "embedded.json", encoding="utf-8") as f:
+        assert json.load(f)["index_type"] == "flat"
+
+
+def test_small_corpus_clamps_ivf_nlist():
+    embedder = Embedder(dim=DIM, index_type="ivf_flat", nlist=1024)
+    assert embedder.add_documents(chunks(100), block_size=32) == 100
+
+    assert embedder.index_type == "ivf_flat"
+    assert embedder.index_kwargs["nlist"] == 2
+    assert faiss.extract_index_ivf(embedder.index).nlist == 2
+    assert embedder.index.ntotal == 100
+
+
+def test_incremental_update_keeps_failed_sources(tmp_path):
+    embedder = Embedder(dim=DIM)
+    embedder.add_documents(chunks(3, "a.json") + [{"text": "b 본문", "chunk_id": 0, "document": "b", "source": "b.json"}])
+    embedder.save(str(tmp_path))
+
+    reloaded = Embedder(dim=DIM)
+    assert reloaded.load(str(tmp_path))
+    # a.json은 한 chunk만 남고, b.json은 다운로드 실패로 기존 chunk 유지
+    reloaded.update_documents(chunks(1, "a.json"), sources={"a.json", "b.json"}, keep_sources={"b.json"})
+
+    assert reloaded.index.ntotal == 2
+    assert sorted(record["source"] for record in reloaded.iter_metadata()) == ["a.json", "b.json"]
@@ -0,0 +1,49 @@
+import meilisearch
+
+from config.lexical import sync_meilisearch
+
+
+class FakeIndex:
+    def __init__(self):
+        self.deleted_filters = []
+        self.added = []
+
+    def update_searchable_attributes(self, attributes):
+        pass
+
+    def update_filterable_attributes(self, attributes):
+        pass
+
+    def delete_all_documents(self):
+        pass
+
+    def delete_documents(self, filter):
+        self.deleted_filters.append(filter)
+
+    def add_documents(self, documents):
+        self.added.append(documents)
+
+
+class FakeClient:
+    def __init__(self, index: FakeIndex):
+        self.fake_index = index
+
+    def create_index(self, name, options):
+        pass
+
+    def index(self, name):
+        return self.fake_index
+
+
+def test_incremental_sync_bounds_delete_filters(monkeypatch):
+    index = FakeIndex()
+    monkeypatch.setattr(meilisearch, "Client", lambda url, api_key=None: FakeClient(index))
+
+    sources = [f'data/{i:03d}"q.json' for i in range(250)]
+    records = ({"id": i, "source": source, "text": "본문"} for i, source in enumerate(sources))
+    sync_meilisearch(records, sources=sources, batch_size=100, filter_batch_size=100)
+
+    assert len(index.deleted_filters) == 3
+    assert all(f.startswith("source IN [") for f in index.deleted_filters)
+    assert index.deleted_filters[-1].count('\\"q.json') == 50  # 큰따옴표는 이스케이프
+    assert [len(batch) for batch in index.added] == [100, 100, 50]
@@ -0,0 +1,36 @@
+from config.metadata_store import MetadataSpool, read_metadata_store, write_metadata_store
+
+
+def record(chunk_id: int, source: str = "a.json"):
+    return {"id": chunk_id, "source": source, "text": f"본문 {chunk_id}", "title": "제목"}
+
+
+def test_spool_writes_records_in_id_order(tmp_path):
+    spool = MetadataSpool()
+    spool.append([record(30), record(10)])
+    spool.append([record(20, "b.json")])
+    spool.write(str(tmp_path))
+
+    assert [r["id"] for r in read_metadata_store(str(tmp_path))] == [10, 20, 30]
+    assert [r["id"] for r in spool.iter_records(sources=["b.json"])] == [20]
+    spool.close()
+
+
+def test_spool_updates_attached_store_in_place(tmp_path):
+    write_metadata_store([record(1), record(2, "b.json"), record(3)], str(tmp_path))
+
+    spool = MetadataSpool()
+    spool.attach(str(tmp_path))
+    assert len(spool) == 3 and 2 in spool
+    assert dict(spool.sources()) == {1: "a.json", 2: "b.json", 3: "a.json"}
+
+    spool.remove([2])
+    spool.append([record(4, "c.json")])
+    spool.write(str(tmp_path))  # 읽고 있던 디렉토리에 다시 저장
+
+    assert list(read_metadata_store(str(tmp_path))) == [record(1), record(3), record(4, "c.json")]
+    # 저장 후에도 같은 spool로 계속 조회/저장 가능
+    assert [r["id"] for r in spool.iter_records()] == [1, 3, 4]
+    spool.write(str(tmp_path))
+    assert [r["id"] for r in read_metadata_store(str(tmp_path))] == [1, 3, 4]
+    spool.close()
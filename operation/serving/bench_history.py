@@ -0,0 +1,65 @@
+import argparse
+import json
+import time
+from langchain_core.messages import HumanMessage, AIMessage, messages_from_dict, message_to_dict
+
+from utils.tokens import tokenizer, trim_history, with_token_count
+
+
+def legacy_count_tokens(messages) -> int:
+    return sum(len(tokenizer.get().encode(message.content)) for message in messages)
+
+
+def legacy_trim(previous_messages, current_messages, max_tokens: int = 2500):
+    """기존 방식: 루프마다 전체 메시지를 다시 인코딩 (디버그 출력용 호출 포함)"""
+    previous_messages = list(previous_messages)
+    all_messages = previous_messages + current_messages
+    legacy_count_tokens(all_messages)
+    while legacy_count_tokens(all_messages) > max_tokens and len(previous_messages) > 0:
+        del previous_messages[:2]
+        all_messages = previous_messages + current_messages
+        legacy_count_tokens(all_messages)
+    legacy_count_tokens(all_messages)
+    return all_messages
+
+
+def build_session(qa, turns: int, cached: bool):
+    messages = []
+    for item in qa[:turns]:
+        pair = [HumanMessage(content=item["QUESTION"]), AIMessage(content=item["ANSWER"])]
+        messages.extend(with_token_count(m) for m in pair) if cached else messages.extend(pair)
+    # Redis 저장/로드와 같은 직렬화 왕복
+    return messages_from_dict([message_to_dict(m) for m in messages])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대화 기록 토큰 계산/trim 요청당 오버헤드 비교")
+    parser.add_argument("--qa-path", default="../../data/instrcution/generation_QA_set_20250722.json")
+    parser.add_argument("--turns", default="10,50,100")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.qa_path, "r", encoding="utf-8") as f:
+        qa = json.load(f)
+    current = [HumanMessage(content=qa[-1]["QUESTION"])]
+
+    print(f"{'turns':>6} {'legacy(ms)':>11} {'cached(ms)':>11}")
+    for turns in [int(t) for t in args.turns.split(",")]:
+        legacy_session = build_session(qa, turns, cached=False)
+        cached_session = build_session(qa, turns, cached=True)
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            legacy_trim(legacy_session, current)
+        legacy_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            trim_history(cached_session, [HumanMessage(content=current[0].content)])
+        cached_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+        print(f"{turns:>6} {legacy_ms:>11.1f} {cached_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import argparse
+import json
+import time
+
+from utils.reranker import RerankerEngine, rerank_with_bge
+
+
+def main():
+    parser = argparse.ArgumentParser(description="리랭커 백엔드별 후보 수에 따른 지연시간 측정")
+    parser.add_argument("--qa-path", default="../../data/instrcution/generation_QA_set_20250722.json")
+    parser.add_argument("--backends", default="torch,int8", help="쉼표로 구분 (torch, int8, onnx)")
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--candidates", default="8,20,50")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.qa_path, "r", encoding="utf-8") as f:
+        qa = json.load(f)
+    # 답변 본문을 후보 문서로 사용
+    docs = [{"document": item["source"], "text": item["ANSWER"]} for item in qa]
+
+    print(f"{'backend':<8} {'후보':>5} {'ms/rerank':>10}")
+    for backend in args.backends.split(","):
+        engine = RerankerEngine(backend=backend, device=args.device)
+        for n in [int(c) for c in args.candidates.split(",")]:
+            rerank_with_bge(qa[0]["QUESTION"], docs[:n], engine)  # warm-up
+            start = time.perf_counter()
+            for i in range(args.repeat):
+                rerank_with_bge(qa[i]["QUESTION"], docs[i:i + n], engine)
+            print(f"{backend:<8} {n:>5} {(time.perf_counter() - start) * 1000 / args.repeat:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
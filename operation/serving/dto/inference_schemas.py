@@ -8,6 +8,17 @@ class Reference(BaseModel):
 class QueryRequest(BaseModel):
     query: str
     session_id: str
+    # 검색 범위 제한 (값 또는 접두어 일치, 같은 필드는 OR / 필드끼리는 AND)
+    sources: Optional[List[str]] = None
+    documents: Optional[List[str]] = None
+    titles: Optional[List[str]] = None
+
+    def filters(self) -> Dict[str, List[str]]:
+        return {
+            field: values
+            for field, values in (("source", self.sources), ("document", self.documents), ("title", self.titles))
+            if values
+        }
 
 class QueryResponse(BaseModel):
     answer: str
@@ -15,4 +26,5 @@ class QueryResponse(BaseModel):
     completion_tokens: Optional[int] = None
     references: Optional[str] = None
     rank: List[Dict[str, Any]]
+    timings: Optional[Dict[str, float]] = None
 
@@ -0,0 +1,71 @@
+import argparse
+import gc
+import json
+import os
+import time
+import numpy as np
+import psutil
+
+from utils.embedding import load_embedder, EMBEDDING_MODEL
+from utils.index import Searcher
+
+
+def rss_mb() -> float:
+    return psutil.Process(os.getpid()).memory_info().rss / (1 << 20)
+
+
+def evaluate(backend: str, questions, sources, searcher: Searcher, top_k: int, baseline=None):
+    gc.collect()
+    before = rss_mb()
+    model = load_embedder(EMBEDDING_MODEL, backend)
+    memory_mb = rss_mb() - before
+
+    model.encode(questions[:4], normalize_embeddings=True)  # warm-up
+    start = time.perf_counter()
+    vectors = np.vstack([
+        model.encode([q], normalize_embeddings=True, convert_to_numpy=True) for q in questions
+    ]).astype("float32")
+    latency_ms = (time.perf_counter() - start) * 1000 / len(questions)
+
+    # QA의 source(MinIO 객체 key)가 top-k 결과 안에 있으면 hit
+    hits = 0
+    for vec, source in zip(vectors, sources):
+        results = searcher.search(vec.reshape(1, -1), top_k)
+        hits += int(any(r.get("source") == source for r in results))
+
+    cosine = float(np.mean(np.sum(vectors * baseline, axis=1))) if baseline is not None else 1.0
+    del model
+    return vectors, {"recall": hits / len(questions), "latency_ms": latency_ms, "memory_mb": memory_mb, "cosine": cosine}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 백엔드별 recall@k / 지연시간 / 메모리 비교 (fp32 기준)")
+    parser.add_argument("--index-dir", default=os.path.join("..", "Vector", "index"))
+    parser.add_argument("--qa-path", default="../../data/instrcution/generation_QA_set_20250722.json")
+    parser.add_argument("--backends", default="torch,onnx,int8")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=8)
+    args = parser.parse_args()
+
+    with open(args.qa_path, "r", encoding="utf-8") as f:
+        qa = json.load(f)[:args.queries]
+    questions = [item["QUESTION"] for item in qa]
+    sources = [item["source"] for item in qa]
+    searcher = Searcher(args.index_dir)
+
+    backends = args.backends.split(",")
+    if backends[0] != "torch":
+        backends.insert(0, "torch")
+
+    baseline = None
+    print(f"{'backend':<8} {f'recall@{args.top_k}':>10} {'Δrecall':>8} {'ms/query':>9} {'메모리MB':>9} {'cos(fp32)':>10}")
+    for backend in backends:
+        vectors, r = evaluate(backend, questions, sources, searcher, args.top_k, baseline)
+        if baseline is None:
+            baseline, base_recall = vectors, r["recall"]
+        print(f"{backend:<8} {r['recall']:>10.4f} {r['recall'] - base_recall:>+8.4f} "
+              f"{r['latency_ms']:>9.1f} {r['memory_mb']:>9.0f} {r['cosine']:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+import httpx
+
+QUERIES = [
+    "고추 탄저병 방제 시기와 약제를 알려주세요.",
+    "딸기 육묘 시 온도 관리는 어떻게 하나요?",
+    "무 재배 시 적정 파종 시기는 언제인가요?",
+    "벼 도열병 예방을 위한 질소 시비량은?",
+    "안녕하세요, 오늘 날씨가 좋네요.",
+]
+
+
+async def worker(client: httpx.AsyncClient, url: str, requests: int, latencies: list, errors: list):
+    session_id = f"loadtest-{uuid.uuid4().hex[:8]}"
+    for i in range(requests):
+        start = time.perf_counter()
+        try:
+            response = await client.post(url, json={"query": QUERIES[i % len(QUERIES)], "session_id": session_id})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(str(e))
+    await client.delete(url.replace("/completions", f"/memory/{session_id}"))
+
+
+async def run(url: str, concurrency: int, requests: int) -> dict:
+    latencies, errors = [], []
+    async with httpx.AsyncClient(timeout=300) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(client, url, requests, latencies, errors) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/v1/chat/completions 동시성별 처리량 측정")
+    parser.add_argument("--url", default="http://localhost:8008/v1/chat/completions")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="쉼표로 구분한 동시 사용자 수")
+    parser.add_argument("--requests", type=int, default=5, help="동시 사용자당 요청 수")
+    args = parser.parse_args()
+
+    print(f"{'동시성':>6} {'성공':>6} {'실패':>6} {'req/s':>8} {'p50(s)':>8} {'p95(s)':>8}")
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        r = asyncio.run(run(args.url, concurrency, args.requests))
+        print(f"{r['concurrency']:>6} {r['ok']:>6} {r['errors']:>6} {r['rps']:>8.2f} {r['p50']:>8.2f} {r['p95']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
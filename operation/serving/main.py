@@ -1,11 +1,48 @@
+import asyncio
+import os
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from router.inference_router import router
+from router.index_router import router as index_router
+from router.metrics_router import router as metrics_router
+from router.health_router import router as health_router
+from utils.search import registry
+from utils.inference import query_cache, QUERY_CACHE_REDIS
+from utils.executors import shutdown_executors
+from utils.clients import clients
+from utils.lifecycle import warm_up_all
+
+# 1이면 import 시점(워커 fork 전)에 모델/인덱스를 미리 로드
+# gunicorn --preload -k uvicorn.workers.UvicornWorker 처럼 fork 기반으로 띄우면 자식 워커가 copy-on-write로 메모리를 공유
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "0") == "1"
+WARMUP_WORKERS = int(os.getenv("WARMUP_WORKERS", "4"))
+
+if PRELOAD_MODELS:
+    warm_up_all(WARMUP_WORKERS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    clients.startup()  # LLM / Redis / MinIO 공유 클라이언트
+    if QUERY_CACHE_REDIS:
+        query_cache.redis = clients.get_redis()
+    # 모델 로드는 백그라운드에서 병렬로 진행, 완료 전까지 /readyz는 503
+    warmup = asyncio.create_task(asyncio.to_thread(warm_up_all, WARMUP_WORKERS))
+    registry.start()  # 인덱스 새 버전 폴링
+    yield
+    registry.stop()
+    warmup.cancel()
+    shutdown_executors()
+    await clients.shutdown()
+
+
 app = FastAPI(
     title="농업 지식 상담 API",
     version="1.0.0",
     description="Vector Search + Reranker + Qwen 기반 농업 상담 서비스",
+    lifespan=lifespan,
 )
 
 # CORS 설정
@@ -19,7 +56,16 @@ app.add_middleware(
 
 # 라우터 등록
 app.include_router(router)
+app.include_router(index_router)
+app.include_router(metrics_router)
+app.include_router(health_router)
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8008, reload=True)
-
+    # reload는 코드 변경마다 모델을 다시 로드하므로 개발 시에만 RELOAD=1로 사용
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8008,
+        reload=os.getenv("RELOAD", "0") == "1",
+        workers=int(os.getenv("WORKERS", "1"))
+    )
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from utils.lifecycle import is_ready, readiness
+
+router = APIRouter(tags=["health"])
+
+@router.get("/healthz")
+async def healthz():
+    # 프로세스가 살아 있으면 OK (모델 로드 여부와 무관)
+    return {"status": "ok"}
+
+@router.get("/readyz")
+async def readyz():
+    # 모델/인덱스가 모두 로드되어야 트래픽을 받을 준비 완료
+    ready = is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "resources": readiness()}
+    )
@@ -0,0 +1,30 @@
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks
+from fastapi.responses import JSONResponse
+from utils.registry import validate_version
+from utils.search import registry
+
+router = APIRouter(
+    prefix="/v1/index",
+    tags=["index"],
+)
+
+@router.get("/version")
+async def index_version():
+    return registry.status()
+
+@router.post("/reload")
+async def reload_index(background_tasks: BackgroundTasks, version: Optional[str] = None):
+    if version is not None:
+        try:
+            validate_version(version)
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"error": str(e)})
+    # 다운로드/웜업은 백그라운드에서 수행하고 완료 시점에 교체
+    background_tasks.add_task(registry.refresh, version)
+    return {"requested": version or "latest", **registry.status()}
+
+@router.post("/rollback")
+async def rollback_index():
+    version = registry.rollback()
+    return {"success": version is not None, **registry.status()}
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from dto.inference_schemas import QueryRequest, QueryResponse
-from utils.inference import generate_response
+from utils.inference import generate_response, stream_response
 from utils.buffer import delete_session_memory
 
 router = APIRouter(
@@ -10,10 +11,19 @@ router = APIRouter(
 
 @router.post("/chat/completions", response_model=QueryResponse)
 async def consult_agriculture(request: QueryRequest):
-    result = generate_response(request.query, session_id=request.session_id)
+    result = await generate_response(request.query, session_id=request.session_id, filters=request.filters())
     return QueryResponse(**result)
 
+@router.post("/chat/completions/stream")
+async def consult_agriculture_stream(request: QueryRequest):
+    # Server-Sent Events: references → token... → done
+    return StreamingResponse(
+        stream_response(request.query, session_id=request.session_id, filters=request.filters()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.delete("/chat/memory/{session_id}")
 async def clear_memory(session_id: str):
-    success = delete_session_memory(session_id, "redis://192.168.0.150:6379")
+    success = await delete_session_memory(session_id)
     return {"success": success}
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from utils.inference import embed_batcher, rerank_batcher, query_cache, semantic_cache
+
+router = APIRouter(
+    prefix="/v1",
+    tags=["metrics"],
+)
+
+@router.get("/metrics")
+async def serving_metrics():
+    return {
+        "batching": {
+            "embed": embed_batcher.stats(),
+            "rerank": rerank_batcher.stats(),
+        },
+        "query_cache": query_cache.stats(),
+        "semantic_cache": semantic_cache.stats(),
+    }
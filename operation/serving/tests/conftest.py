@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 서빙 앱은 operation/serving을 루트로 실행되므로(utils.*, router.* import) 테스트도 같은 경로에서 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
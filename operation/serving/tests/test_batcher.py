@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.batcher import MicroBatcher
+
+
+class Recorder:
+    """batch_fn 호출마다 배치 내용과 실행 구간을 기록합니다. gate가 있으면 열릴 때까지 대기."""
+
+    def __init__(self, delay: float = 0.0, gate: threading.Event = None):
+        self.delay = delay
+        self.gate = gate
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, items):
+        start = time.perf_counter()
+        if self.gate is not None:
+            self.gate.wait(5)
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls.append((list(items), start, time.perf_counter()))
+        return [item * 10 for item in items]
+
+
+@pytest.fixture
+def executor():
+    pool = ThreadPoolExecutor(max_workers=4)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+def test_batches_run_concurrently_up_to_limit(executor):
+    recorder = Recorder(delay=0.2)
+
+    async def run():
+        batcher = MicroBatcher(recorder, executor, max_batch_size=2, max_wait_ms=1, max_concurrency=3)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(6)))
+        await batcher.close()
+        return results
+
+    started = time.perf_counter()
+    assert asyncio.run(run()) == [i * 10 for i in range(6)]
+    assert time.perf_counter() - started < 0.5  # 순차 실행이면 3 × 0.2초
+    assert len(recorder.calls) == 3
+    latest_start = max(start for _, start, _ in recorder.calls)
+    earliest_end = min(end for _, _, end in recorder.calls)
+    assert latest_start < earliest_end  # 세 배치의 실행 구간이 겹침
+
+
+def test_requests_wait_for_free_slot_and_merge(executor):
+    gate = threading.Event()
+    recorder = Recorder(gate=gate)
+
+    async def run():
+        batcher = MicroBatcher(recorder, executor, max_batch_size=8, max_wait_ms=1, max_concurrency=1)
+        first = asyncio.ensure_future(batcher.submit(0))
+        await asyncio.sleep(0.05)  # 첫 배치가 유일한 슬롯을 잡고 실행 중
+        rest = [asyncio.ensure_future(batcher.submit(i)) for i in range(1, 5)]
+        await asyncio.sleep(0.05)
+        assert batcher.stats()["queue_depth"] == 4
+        gate.set()
+        results = await asyncio.gather(first, *rest)
+        await batcher.close()
+        return results
+
+    assert asyncio.run(run()) == [0, 10, 20, 30, 40]
+    assert [items for items, _, _ in recorder.calls] == [[0], [1, 2, 3, 4]]
+
+
+def test_batch_exception_reaches_every_future(executor):
+    def fail(items):
+        raise ValueError("batch failed")
+
+    async def run():
+        batcher = MicroBatcher(fail, executor, max_batch_size=4, max_wait_ms=5, max_concurrency=2)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+        stats = batcher.stats()
+        await batcher.close()
+        return results, stats
+
+    results, stats = asyncio.run(run())
+    assert len(results) == 3
+    assert all(isinstance(result, ValueError) for result in results)
+    assert stats["running_batches"] == 0
+
+
+def test_cancelled_requests_are_skipped_without_leaking_slot(executor):
+    recorder = Recorder()
+
+    async def run():
+        batcher = MicroBatcher(recorder, executor, max_batch_size=4, max_wait_ms=20, max_concurrency=1)
+        # 수집 대기 중에 모두 취소된 배치는 실행되지 않고 슬롯을 반납해야 함
+        cancelled = [asyncio.ensure_future(batcher.submit(i)) for i in range(3)]
+        await asyncio.sleep(0)
+        for task in cancelled:
+            task.cancel()
+        await asyncio.gather(*cancelled, return_exceptions=True)
+        await asyncio.sleep(0.05)
+
+        # 슬롯이 하나뿐이므로 누수가 있으면 다음 요청이 영원히 대기
+        result = await asyncio.wait_for(batcher.submit(7), timeout=1)
+        await batcher.close()
+        return result
+
+    assert asyncio.run(run()) == 70
+    assert [items for items, _, _ in recorder.calls] == [[7]]
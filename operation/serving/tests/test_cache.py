@@ -0,0 +1,40 @@
+import asyncio
+
+import numpy as np
+
+from utils.cache import QueryCache
+
+
+def test_index_swap_keeps_embeddings_and_both_versions():
+    cache = QueryCache(model_key="model:local")
+    vector = np.arange(4, dtype="float32").reshape(1, -1)
+
+    async def run():
+        await cache.set_embedding("토마토 적온", vector)
+        await cache.set_references("토마토 적온", "v1", [{"document": "old"}])
+        # 교체 중: 새 버전 요청과 이전 버전을 잡은 요청이 번갈아 들어옴
+        await cache.set_references("토마토 적온", "v2", [{"document": "new"}])
+        await cache.get_references("토마토 적온", "v1")
+        return (
+            await cache.get_embedding("토마토 적온 "),
+            await cache.get_references("토마토 적온", "v2"),
+            await cache.get_references("토마토 적온", "v1"),
+        )
+
+    embedding, new, old = asyncio.run(run())
+    np.testing.assert_array_equal(embedding, vector)
+    assert new == [{"document": "new"}]
+    assert old == [{"document": "old"}]  # 버전이 키에 있어 서로 섞이지 않음
+
+
+def test_references_are_scoped_by_version_and_filter():
+    cache = QueryCache(model_key="model:local")
+
+    async def run():
+        await cache.set_references("q", "v1", [{"document": "all"}])
+        return (
+            await cache.get_references("q", "v2"),
+            await cache.get_references("q", "v1", scope=':{"source":["a"]}'),
+        )
+
+    assert asyncio.run(run()) == (None, None)
@@ -0,0 +1,162 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+
+import faiss
+import numpy as np
+import pytest
+
+from utils.index import Searcher
+from utils.metadata_store import METADATA_BLOB, METADATA_IDS, METADATA_OFFSETS
+from utils.registry import IndexRegistry, validate_version
+
+DIM = 4
+
+
+def write_index(index_dir: str, version: str) -> str:
+    """Embedder.save와 같은 파일 구성(vector.index + metadata blob/offsets)의 작은 인덱스를 만듭니다."""
+    os.makedirs(index_dir, exist_ok=True)
+    ids = np.array([1, 2, 3], dtype="int64")
+    vectors = np.eye(DIM, dtype="float32")[:len(ids)]
+    index = faiss.index_factory(DIM, "IDMap2,Flat", faiss.METRIC_INNER_PRODUCT)
+    index.add_with_ids(vectors, ids)
+    faiss.write_index(index, os.path.join(index_dir, "vector.index"))
+
+    offsets = [0]
+    with open(os.path.join(index_dir, METADATA_BLOB), "wb") as f:
+        for chunk_id in ids:
+            data = json.dumps({"id": int(chunk_id), "source": "a.json", "text": f"{version}-{chunk_id}"}).encode("utf-8")
+            f.write(data)
+            offsets.append(offsets[-1] + len(data))
+    np.save(os.path.join(index_dir, METADATA_IDS), ids)
+    np.save(os.path.join(index_dir, METADATA_OFFSETS), np.array(offsets, dtype="int64"))
+
+    with open(os.path.join(index_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": version}, f)
+    return index_dir
+
+
+class FakeS3:
+    """registry가 쓰는 get_object / download_file만 흉내 내는 로컬 디렉토리 기반 클라이언트."""
+
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def get_object(self, Bucket, Key):
+        if not os.path.exists(self._path(Key)):
+            raise self.exceptions.NoSuchKey(Key)
+        with open(self._path(Key), "rb") as f:
+            return {"Body": io.BytesIO(f.read())}
+
+    def download_file(self, bucket, key, path):
+        shutil.copyfile(self._path(key), path)
+
+
+def publish(root: str, prefix: str, version: str):
+    """Embedder.upload_to_minio와 같은 배치로 버전을 게시합니다."""
+    version_dir = write_index(os.path.join(root, prefix, "versions", version), version)
+    files = {}
+    for name in os.listdir(version_dir):
+        if name == "manifest.json":
+            continue
+        with open(os.path.join(version_dir, name), "rb") as f:
+            files[name] = {"sha256": hashlib.sha256(f.read()).hexdigest()}
+    with open(os.path.join(version_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": version, "files": files}, f)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return IndexRegistry(cache_dir=str(tmp_path / "cache"), prefix="index/faiss/", client=FakeS3(str(tmp_path / "s3")))
+
+
+def searcher(tmp_path, version: str) -> Searcher:
+    return Searcher(write_index(str(tmp_path / "local" / version), version), version=version)
+
+
+def test_retired_searcher_closes_after_last_release(registry, tmp_path):
+    registry._swap(searcher(tmp_path, "v1"))
+    with registry.lease() as v1:
+        with registry.lease():
+            registry._swap(searcher(tmp_path, "v2"))
+            registry._swap(searcher(tmp_path, "v3"))  # v1이 current/previous에서 밀려남
+            assert not v1.closed
+            assert registry.status()["retiring"] == ["v1"]
+        assert not v1.closed  # 아직 하나의 lease가 남아 있음
+        assert v1.search(np.eye(DIM, dtype="float32")[:1], top_k=1)[0]["id"] == 1
+    assert v1.closed
+    assert v1.index is None
+    assert not v1.acquire()
+
+
+def test_retire_without_users_closes_immediately(registry, tmp_path):
+    v1 = searcher(tmp_path, "v1")
+    for s in (v1, searcher(tmp_path, "v2"), searcher(tmp_path, "v3")):
+        registry._swap(s)
+    assert v1.closed
+    assert registry.status()["retiring"] == []
+
+
+def test_rollback_does_not_retire_either_version(registry, tmp_path):
+    v1, v2 = searcher(tmp_path, "v1"), searcher(tmp_path, "v2")
+    registry._swap(v1)
+    registry._swap(v2)
+    assert registry.rollback() == "v1"
+    assert registry.current is v1 and registry.previous is v2
+    assert not v1.closed and not v2.closed
+
+
+def test_lease_without_active_index_raises(registry):
+    with pytest.raises(RuntimeError):
+        with registry.lease():
+            pass
+
+
+def test_prune_keeps_versions_still_in_use(tmp_path):
+    registry = IndexRegistry(cache_dir=str(tmp_path / "cache"), keep_versions=1, client=FakeS3(str(tmp_path)))
+    versions_dir = tmp_path / "cache" / "versions"
+    for i, version in enumerate(["v1", "v2", "v3", "v4"]):
+        write_index(str(versions_dir / version), version)
+        os.utime(versions_dir / version, (i, i))
+
+    registry._swap(Searcher(str(versions_dir / "v1"), version="v1"))
+    with registry.lease():
+        registry._swap(Searcher(str(versions_dir / "v3"), version="v3"))
+        registry._swap(Searcher(str(versions_dir / "v4"), version="v4"))  # v1은 retire됐지만 사용 중
+        registry._prune()
+        assert sorted(os.listdir(versions_dir)) == ["v1", "v3", "v4"]
+    registry._prune()
+    assert sorted(os.listdir(versions_dir)) == ["v3", "v4"]
+
+
+@pytest.mark.parametrize("version", ["../etc", "a/b", "..", ".", "", "v1 2"])
+def test_validate_version_rejects_path_like_ids(version):
+    with pytest.raises(ValueError):
+        validate_version(version)
+
+
+def test_failed_pinned_refresh_keeps_polling(registry):
+    with pytest.raises(ValueError):
+        registry.refresh("../escape")
+    assert not registry.pinned
+
+    with pytest.raises(FakeS3.exceptions.NoSuchKey):
+        registry.refresh("missing")  # MinIO에 없는 버전
+    assert not registry.pinned
+    assert registry.current is None
+
+
+def test_pinned_refresh_pins_after_activation(registry, tmp_path):
+    publish(str(tmp_path / "s3"), "index/faiss", "v1")
+    assert registry.refresh("v1") == "v1"
+    assert registry.current.version == "v1"
+    assert registry.pinned
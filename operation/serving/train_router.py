@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+
+from utils.routing import EmbeddingRouter, GENERAL_CHAT_EXAMPLES, ROUTER_PATH, route_query_llm
+
+
+def load_examples(qa_path: str):
+    with open(qa_path, "r", encoding="utf-8") as f:
+        questions = [qa["QUESTION"] for qa in json.load(f)]
+    texts = questions + GENERAL_CHAT_EXAMPLES
+    labels = np.array([1] * len(questions) + [0] * len(GENERAL_CHAT_EXAMPLES))  # 1 = document_search
+    return texts, labels
+
+
+async def evaluate_llm(texts, labels):
+    correct, latencies = 0, []
+    for text, label in zip(texts, labels):
+        start = time.perf_counter()
+        result = await route_query_llm(text)
+        latencies.append(time.perf_counter() - start)
+        correct += int((result["route"] == "document_search") == bool(label))
+    return correct / len(texts), np.mean(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 기반 쿼리 라우터 학습 및 LLM 라우터와 비교")
+    parser.add_argument("--qa-path", default="../../data/instrcution/generation_QA_set_20250722.json")
+    parser.add_argument("--model", default="dragonkue/snowflake-arctic-embed-l-v2.0-ko")
+    parser.add_argument("--output", default=ROUTER_PATH)
+    parser.add_argument("--skip-llm", action="store_true", help="LLM 라우터(vLLM) 비교 생략")
+    args = parser.parse_args()
+
+    texts, labels = load_examples(args.qa_path)
+    model = SentenceTransformer(args.model)
+    vectors = model.encode(texts, batch_size=64, normalize_embeddings=True, convert_to_numpy=True).astype("float32")
+
+    train_x, test_x, train_y, test_y, _, test_texts = train_test_split(
+        vectors, labels, texts, test_size=0.2, stratify=labels, random_state=42
+    )
+    clf = LogisticRegression(class_weight="balanced", C=10.0, max_iter=1000).fit(train_x, train_y)
+    router = EmbeddingRouter(clf.coef_[0], clf.intercept_[0])
+
+    predictions = router.predict_batch(test_x)
+    accuracy = np.mean([(p == "document_search") == bool(y) for p, y in zip(predictions, test_y)])
+
+    start = time.perf_counter()
+    for vec in test_x:
+        router.predict(vec)
+    router_ms = (time.perf_counter() - start) * 1000 / len(test_x)
+
+    start = time.perf_counter()
+    for text in test_texts[:50]:
+        model.encode([text], normalize_embeddings=True)
+    embed_ms = (time.perf_counter() - start) * 1000 / min(len(test_texts), 50)
+
+    print(f"학습 {len(train_x)}개 / 평가 {len(test_x)}개 (일반대화 {int((test_y == 0).sum())}개)")
+    print(f"{'router':<12} {'accuracy':>9} {'ms/query':>10}")
+    print(f"{'embedding':<12} {accuracy:>9.4f} {router_ms:>10.3f}  (쿼리 임베딩 {embed_ms:.1f}ms는 검색과 공유)")
+
+    if not args.skip_llm:
+        llm_accuracy, llm_ms = asyncio.run(evaluate_llm(test_texts, test_y))
+        print(f"{'llm':<12} {llm_accuracy:>9.4f} {llm_ms:>10.3f}")
+
+    router.save(args.output)
+    print(f"라우터 저장 완료 → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import asyncio
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+
+
+class MicroBatcher:
+    """
+    여러 요청에서 동시에 들어온 작업을 최대 max_wait_ms 동안(또는 max_batch_size개까지) 모아
+    batch_fn(items) 한 번으로 실행하고, 결과를 각 요청의 Future로 돌려줍니다.
+    batch_fn은 items와 같은 길이/순서의 결과 리스트를 반환해야 합니다.
+    배치는 최대 max_concurrency개까지 executor에서 동시에 실행되고, 모든 슬롯이 사용 중이면
+    그동안 들어온 작업이 다음 배치로 모입니다. (executor의 워커 수 이하로 두는 것이 좋음)
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        executor: ThreadPoolExecutor,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 3.0,
+        max_concurrency: int = 1,
+        name: str = "batcher"
+    ):
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrency = max(1, max_concurrency)
+        self.name = name
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._running: Set[asyncio.Task] = set()
+
+        # 튜닝용 지표
+        self.batches = 0
+        self.items = 0
+        self.wait_ms_total = 0.0
+        self.run_ms_total = 0.0
+        self.size_histogram = Counter()
+
+    async def submit(self, item: Any) -> Any:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._worker = asyncio.create_task(self._run(), name=self.name)
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> List:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            await self._slots.acquire()  # 빈 슬롯이 생길 때까지 큐에 작업이 계속 쌓임
+            batch = await self._collect()
+            batch = [entry for entry in batch if not entry[1].cancelled()]
+            if not batch:
+                self._slots.release()
+                continue
+
+            task = asyncio.create_task(self._execute(batch), name=f"{self.name}-batch")
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, batch: List):
+        loop = asyncio.get_running_loop()
+        try:
+            started = time.perf_counter()
+            self.wait_ms_total += sum(started - enqueued for _, _, enqueued in batch) * 1000
+            try:
+                results = await loop.run_in_executor(self.executor, self.batch_fn, [item for item, _, _ in batch])
+                for (_, future, _), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+            self.run_ms_total += (time.perf_counter() - started) * 1000
+            self.batches += 1
+            self.items += len(batch)
+            self.size_histogram[len(batch)] += 1
+        finally:
+            self._slots.release()
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        batches = max(self.batches, 1)
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "running_batches": len(self._running),
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / batches, 2),
+            "avg_wait_ms": round(self.wait_ms_total / max(self.items, 1), 3),
+            "avg_run_ms": round(self.run_ms_total / batches, 3),
+            "batch_size_histogram": dict(sorted(self.size_histogram.items())),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_concurrency": self.max_concurrency,
+        }
@@ -1,24 +1,37 @@
-from langchain.memory import ConversationBufferMemory
-from langchain_community.chat_message_histories import RedisChatMessageHistory
+import json
+from typing import List, Optional
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from redis import asyncio as aioredis
 
-def delete_session_memory(session_id: str, redis_url:str):
+from .clients import clients
+
+
+class AsyncRedisHistory:
+    """
+    RedisChatMessageHistory와 같은 키/포맷(message_store:{session_id}, LPUSH된 JSON)을 쓰는 비동기 대화 기록.
+    이벤트 루프를 막지 않도록 redis.asyncio 클라이언트를 사용합니다.
+    """
+
+    def __init__(self, session_id: str, key_prefix: str = "message_store:",
+                 client: Optional[aioredis.Redis] = None):
+        self.key = key_prefix + session_id
+        self.client = client or clients.get_redis()  # 앱 전체 공유 커넥션 풀
+
+    async def aget_messages(self) -> List[BaseMessage]:
+        items = await self.client.lrange(self.key, 0, -1)
+        return messages_from_dict([json.loads(item) for item in reversed(items)])
+
+    async def aadd_messages(self, messages: List[BaseMessage]):
+        await self.client.lpush(self.key, *[json.dumps(message_to_dict(m), ensure_ascii=False) for m in messages])
+
+    async def aclear(self):
+        await self.client.delete(self.key)
+
+
+async def delete_session_memory(session_id: str):
     try:
-        memory = RedisChatMessageHistory(session_id=session_id, url=redis_url)
-        memory.clear()
+        await AsyncRedisHistory(session_id).aclear()
         return True
     except Exception as e:
         print(f"메모리 처리 실패 : {e}")
         return False
-
-def save_session_memory(session_id: str, redis_url: str) -> ConversationBufferMemory:
-    try:
-        chat_history = RedisChatMessageHistory(session_id=session_id, url=redis_url)
-        memory = ConversationBufferMemory(
-            memory_key="chat_history",
-            chat_memory=chat_history,
-            return_messages=True
-        )
-        return memory
-    except Exception as e:
-        print(f"메모리 저장 실패 : {e}")
-        return None
\ No newline at end of file
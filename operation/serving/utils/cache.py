@@ -0,0 +1,146 @@
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+import numpy as np
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+
+from redis import asyncio as aioredis
+
+
+def normalize_query(query: str) -> str:
+    """공백/대소문자/전각문자/끝 문장부호 차이를 무시하도록 쿼리를 정규화합니다."""
+    query = unicodedata.normalize("NFKC", query).lower()
+    query = re.sub(r"\s+", " ", query).strip()
+    return query.rstrip("?!.~ ")
+
+
+class LRUCache:
+    """TTL이 있는 스레드 안전 LRU."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class QueryCache:
+    """
+    2단계 쿼리 캐시.
+      L1: 프로세스 내 LRU (정규화된 쿼리 → 임베딩 / 리랭크된 references)
+      L2: (선택) Redis 공유 캐시. 대화 기록용 Redis를 그대로 사용합니다.
+    references 키에는 인덱스 버전이 들어가므로 인덱스가 교체되면 이전 결과는 조회되지 않고 LRU/TTL로 밀려납니다.
+    (교체 중 이전 버전을 잡은 요청이 섞여도 캐시를 비우지 않으므로 임베딩과 새 버전 결과가 유지됩니다)
+    임베딩은 인덱스와 무관하고 모델/백엔드에만 의존하므로 model_key로 구분합니다.
+    """
+
+    def __init__(
+        self,
+        model_key: str,
+        maxsize: int = 10000,
+        ttl: float = 3600,
+        redis: Optional[aioredis.Redis] = None,
+        key_prefix: str = "query_cache:"
+    ):
+        self.model_key = model_key
+        self.ttl = ttl
+        self.l1 = LRUCache(maxsize, ttl)
+        self.redis = redis
+        self.key_prefix = key_prefix
+        self._index_version: Optional[str] = None
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def _key(self, kind: str, scope: str, query: str) -> str:
+        digest = hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()
+        return f"{self.key_prefix}{kind}:{scope}:{digest}"
+
+    async def _get(self, kind: str, key: str, decode) -> Optional[Any]:
+        value = self.l1.get(key)
+        if value is not None:
+            self.hits[f"{kind}_l1"] += 1
+            return value
+
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(key)
+            except Exception as e:
+                print(f"캐시 조회 실패: {e}")
+                raw = None
+            if raw is not None:
+                value = decode(raw)
+                self.l1.set(key, value)
+                self.hits[f"{kind}_l2"] += 1
+                return value
+
+        self.misses[kind] += 1
+        return None
+
+    async def _set(self, key: str, value: Any, encoded: bytes):
+        self.l1.set(key, value)
+        if self.redis is not None:
+            try:
+                await self.redis.set(key, encoded, ex=int(self.ttl))
+            except Exception as e:
+                print(f"캐시 저장 실패: {e}")
+
+    async def get_embedding(self, query: str) -> Optional[np.ndarray]:
+        key = self._key("embedding", self.model_key, query)
+        return await self._get("embedding", key, lambda raw: np.frombuffer(raw, dtype="float32").reshape(1, -1))
+
+    async def set_embedding(self, query: str, vector: np.ndarray):
+        vector = np.ascontiguousarray(vector, dtype="float32").reshape(1, -1)
+        await self._set(self._key("embedding", self.model_key, query), vector, vector.tobytes())
+
+    async def get_references(self, query: str, index_version: str, scope: str = "") -> Optional[List[Dict[str, Any]]]:
+        # scope: 검색 필터 등 같은 쿼리라도 결과가 달라지는 조건
+        key = self._key("references", f"{index_version}{scope}", query)
+        return await self._get("references", key, json.loads)
+
+    async def set_references(self, query: str, index_version: str, references: List[Dict[str, Any]], scope: str = ""):
+        self._index_version = index_version  # 통계용: 마지막으로 결과를 저장한 버전
+        key = self._key("references", f"{index_version}{scope}", query)
+        await self._set(key, references, json.dumps(references, ensure_ascii=False).encode("utf-8"))
+
+    def stats(self) -> Dict[str, Any]:
+        result = {"l1_size": len(self.l1), "index_version": self._index_version, "redis": self.redis is not None}
+        for kind in ("embedding", "references"):
+            l1, l2, miss = self.hits[f"{kind}_l1"], self.hits[f"{kind}_l2"], self.misses[kind]
+            total = l1 + l2 + miss
+            result[kind] = {
+                "l1_hits": l1,
+                "l2_hits": l2,
+                "misses": miss,
+                "hit_rate": round((l1 + l2) / total, 4) if total else 0.0,
+            }
+        return result
@@ -0,0 +1,138 @@
+import os
+import threading
+from typing import Optional
+
+import boto3
+import httpx
+import meilisearch
+from botocore.config import Config
+from langchain_openai import ChatOpenAI
+from redis import asyncio as aioredis
+
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://localhost:8000/v1")
+LLM_MODEL = os.getenv("LLM_MODEL", "unsloth/gemma-3-4b-it")
+LLM_API_KEY = os.getenv("LLM_API_KEY", "sk-fake-key")
+# vLLM(--max-num-seqs 16, operation/vLLM/start-vllm.sh)에 동시에 보내는 요청 수 상한. 초과 요청은 커넥션 풀에서 대기
+# vLLM 설정을 바꾸면 같은 값으로 맞춤
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "16"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://192.168.0.150:6379")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "64"))
+
+MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "http://localhost:9000")
+MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", "minio")
+MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "miniostorage")
+
+MEILI_URL = os.getenv("MEILI_URL", "http://localhost:7700")
+MEILI_API_KEY = os.getenv("MEILI_API_KEY") or None
+
+END_OF_TURN = "<end_of_turn>"
+
+
+class SharedClients:
+    """
+    프로세스 전체에서 공유하는 외부 클라이언트 모음.
+      - OpenAI 호환(vLLM) 엔드포인트: keep-alive 커넥션 풀을 가진 httpx.AsyncClient 하나를 모든 ChatOpenAI가 공유
+      - Redis: 하나의 ConnectionPool
+      - MinIO: 하나의 boto3 클라이언트 (스레드 안전)
+      - Meilisearch: 하나의 클라이언트 (내부 requests 세션 재사용)
+    앱 lifespan에서 startup()/shutdown()으로 관리하며, 스크립트 등에서 startup 전에 접근하면 그때 생성합니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self.chat_llm: Optional[ChatOpenAI] = None
+        self.router_llm: Optional[ChatOpenAI] = None
+        self.redis_pool: Optional[aioredis.ConnectionPool] = None
+        self.redis: Optional[aioredis.Redis] = None
+        self.s3 = None
+        self.meili: Optional[meilisearch.Client] = None
+
+    def startup(self):
+        with self._lock:
+            if self.http_client is not None:
+                return
+
+            self.http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_CONNECTIONS
+                ),
+                timeout=httpx.Timeout(LLM_TIMEOUT, pool=None),  # 풀 대기는 타임아웃 없이
+            )
+            self.chat_llm = ChatOpenAI(
+                model_name=LLM_MODEL,
+                openai_api_base=LLM_BASE_URL,
+                max_tokens=1024,
+                temperature=0.7,
+                openai_api_key=LLM_API_KEY,
+                http_async_client=self.http_client,
+                stream_usage=True,
+                model_kwargs={
+                    "stop": [END_OF_TURN],
+                    "frequency_penalty": 0.2
+                }
+            )
+            self.router_llm = ChatOpenAI(
+                model_name=LLM_MODEL,
+                openai_api_base=LLM_BASE_URL,
+                max_tokens=30,
+                temperature=0,
+                openai_api_key=LLM_API_KEY,
+                http_async_client=self.http_client,
+            )
+
+            self.redis_pool = aioredis.ConnectionPool.from_url(REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS)
+            self.redis = aioredis.Redis(connection_pool=self.redis_pool)
+
+            self.s3 = create_s3_client()
+            self.meili = meilisearch.Client(MEILI_URL, MEILI_API_KEY, timeout=5)
+
+    async def shutdown(self):
+        with self._lock:
+            http_client, redis, redis_pool = self.http_client, self.redis, self.redis_pool
+            self.http_client = self.chat_llm = self.router_llm = None
+            self.redis = self.redis_pool = None
+            self.s3 = self.meili = None
+
+        if http_client is not None:
+            await http_client.aclose()
+        if redis is not None:
+            await redis.aclose()
+        if redis_pool is not None:
+            await redis_pool.disconnect()
+
+    def get_chat_llm(self) -> ChatOpenAI:
+        self.startup()
+        return self.chat_llm
+
+    def get_router_llm(self) -> ChatOpenAI:
+        self.startup()
+        return self.router_llm
+
+    def get_redis(self) -> aioredis.Redis:
+        self.startup()
+        return self.redis
+
+    def get_s3(self):
+        self.startup()
+        return self.s3
+
+    def get_meili(self) -> meilisearch.Client:
+        self.startup()
+        return self.meili
+
+
+def create_s3_client():
+    return boto3.client(
+        "s3",
+        endpoint_url=MINIO_ENDPOINT,
+        aws_access_key_id=MINIO_ACCESS_KEY,
+        aws_secret_access_key=MINIO_SECRET_KEY,
+        config=Config(max_pool_connections=16, tcp_keepalive=True)
+    )
+
+
+clients = SharedClients()
@@ -0,0 +1,24 @@
+import os
+import torch
+from sentence_transformers import SentenceTransformer
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "dragonkue/snowflake-arctic-embed-l-v2.0-ko")
+# 쿼리 임베딩 백엔드: torch(fp32, 기본), onnx(ONNX Runtime), int8(torch 동적 양자화, CPU)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_BACKENDS = ("torch", "onnx", "int8")
+
+
+def load_embedder(model_name: str = EMBEDDING_MODEL, backend: str = EMBEDDING_BACKEND) -> SentenceTransformer:
+    """
+    쿼리 인코딩용 SentenceTransformer를 백엔드에 맞게 로드합니다.
+    문서 인덱스는 fp32 모델로 만들어지므로, onnx/int8은 evaluate_embedding.py로 recall 손실을 확인한 뒤 사용합니다.
+    """
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+    if backend == "onnx":
+        # sentence-transformers가 ONNX 파일이 없으면 내보내기까지 수행 (optimum[onnxruntime] 필요)
+        return SentenceTransformer(model_name, backend="onnx", device="cpu")
+    if backend == "int8":
+        model = SentenceTransformer(model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    raise ValueError(f"지원하지 않는 임베딩 백엔드: {backend} (가능: {', '.join(EMBEDDING_BACKENDS)})")
@@ -0,0 +1,29 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# CPU/GPU 연산(임베딩, 리랭킹)을 이벤트 루프 밖 전용 스레드풀에서 실행
+# torch/faiss는 연산 중 GIL을 놓기 때문에 스레드풀로도 요청 간 병렬 처리가 됩니다.
+embed_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("EMBED_WORKERS", "2")), thread_name_prefix="embed"
+)
+rerank_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("RERANK_WORKERS", "2")), thread_name_prefix="rerank"
+)
+
+# BM25 검색(Meilisearch HTTP 호출 / 로컬 인덱스)은 벡터 검색과 동시에 실행되도록 별도 풀 사용
+lexical_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("LEXICAL_WORKERS", "4")), thread_name_prefix="lexical"
+)
+
+
+async def run_in(executor: ThreadPoolExecutor, func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+
+
+def shutdown_executors():
+    embed_executor.shutdown(wait=False, cancel_futures=True)
+    rerank_executor.shutdown(wait=False, cancel_futures=True)
+    lexical_executor.shutdown(wait=False, cancel_futures=True)
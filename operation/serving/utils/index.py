@@ -0,0 +1,232 @@
+from typing import Iterator, List, Dict, NamedTuple, Optional
+from collections import OrderedDict
+from contextlib import contextmanager
+import faiss
+import json
+import numpy as np
+import os
+import threading
+
+from .metadata_store import MetadataStore
+
+# mmap 로드 시 워커들이 같은 파일 페이지를 OS 페이지 캐시로 공유 (0이면 프로세스별 복사본)
+INDEX_MMAP = os.getenv("FAISS_INDEX_MMAP", "1") == "1"
+
+# ANN 검색 파라미터 (IVF: nprobe, HNSW: efSearch). Flat 인덱스에서는 무시됨
+NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+
+# 검색 필터로 사용할 수 있는 메타데이터 필드 (Embedder가 chunk마다 저장)
+FILTER_FIELDS = ("source", "document", "title")
+FILTER_CACHE_SIZE = int(os.getenv("FILTER_CACHE_SIZE", "256"))
+
+
+def set_search_params(index: faiss.Index, nprobe: int = NPROBE, ef_search: int = EF_SEARCH) -> faiss.Index:
+    try:
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    except RuntimeError:
+        pass
+
+    base = faiss.downcast_index(index)
+    if hasattr(base, "id_map"):  # IndexIDMap2 래퍼
+        base = faiss.downcast_index(base.index)
+    if hasattr(base, "hnsw"):
+        base.hnsw.efSearch = ef_search
+    return index
+
+
+def search_parameters(index: faiss.Index, selector: faiss.IDSelector,
+                      nprobe: int = NPROBE, ef_search: int = EF_SEARCH) -> faiss.SearchParameters:
+    """
+    ID selector를 담은 검색 파라미터. 파라미터를 넘기면 인덱스에 설정된 nprobe/efSearch 대신
+    파라미터 값이 쓰이므로 인덱스 타입에 맞는 클래스로 만들어 같은 값을 다시 지정합니다.
+    """
+    base = faiss.downcast_index(index)
+    if hasattr(base, "id_map"):  # IndexIDMap2 래퍼는 selector를 내부 위치로 변환해 그대로 전달
+        base = faiss.downcast_index(base.index)
+
+    if hasattr(base, "nprobe"):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+    if hasattr(base, "hnsw"):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search)
+    return faiss.SearchParameters(sel=selector)
+
+
+class ResolvedFilter(NamedTuple):
+    ids: np.ndarray                 # 필터를 통과하는 chunk ID (정렬)
+    values: Dict[str, List[str]]    # 필드별로 실제 매칭된 값 (BM25 쪽 필터 변환용)
+    selector: Optional[faiss.IDSelector]  # 검색 중 읽기만 하므로 스레드 간 공유 가능
+
+
+def load_index(path: str, use_mmap: bool = INDEX_MMAP) -> faiss.Index:
+    """
+    FAISS 인덱스를 읽기 전용 mmap으로 로드합니다.
+    IVF 계열은 inverted list가, Flat/HNSW 저장소는 IO_FLAG_MMAP_IFC를 지원하는 faiss 버전에서 mmap 됩니다.
+    mmap이 불가능한 인덱스 타입이면 일반 로드로 대체합니다.
+    """
+    if use_mmap:
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        try:
+            return set_search_params(faiss.read_index(path, flags))
+        except RuntimeError as e:
+            print(f"mmap 인덱스 로드 실패, 일반 로드로 대체: {e}")
+    return set_search_params(faiss.read_index(path))
+
+
+class Searcher:
+    """
+    한 버전의 FAISS 인덱스와 메타데이터 묶음. 교체는 Searcher 단위로 이뤄집니다.
+    검색하는 쪽은 acquire/release(IndexRegistry.lease)로 사용 중임을 알리고,
+    교체되어 retire()된 Searcher는 진행 중인 검색이 모두 끝나면 mmap을 닫습니다.
+    """
+
+    def __init__(self, index_dir: str, version: str = "local"):
+        self.index_dir = index_dir
+        self.version = version
+        self.index = load_index(os.path.join(index_dir, "vector.index"))
+        # 인덱스는 chunk 해시 ID(IndexIDMap2)를 반환하므로 ID로 메타데이터를 조회 (top-k 행만 디코딩)
+        self.metadata = MetadataStore(index_dir)
+
+        self._partitions: Optional[Dict[str, Dict[str, np.ndarray]]] = None
+        self._filters: "OrderedDict[str, ResolvedFilter]" = OrderedDict()
+        self._filter_lock = threading.Lock()
+
+        self._users = 0
+        self._retired = False
+        self._closed = False
+        self._lease_lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """검색 전에 사용 중으로 표시합니다. 이미 닫힌 Searcher면 False."""
+        with self._lease_lock:
+            if self._closed:
+                return False
+            self._users += 1
+            return True
+
+    def release(self):
+        with self._lease_lock:
+            self._users -= 1
+            close = self._retired and self._users == 0 and not self._closed
+            self._closed = self._closed or close
+        if close:
+            self._close()
+
+    def retire(self):
+        """새 요청에는 더 이상 쓰이지 않는 버전으로 표시하고, 사용 중인 검색이 없으면 바로 닫습니다."""
+        with self._lease_lock:
+            self._retired = True
+            close = self._users == 0 and not self._closed
+            self._closed = self._closed or close
+        if close:
+            self._close()
+
+    @contextmanager
+    def in_use(self) -> Iterator["Searcher"]:
+        if not self.acquire():
+            raise RuntimeError(f"인덱스 버전 {self.version}은(는) 이미 정리되었습니다.")
+        try:
+            yield self
+        finally:
+            self.release()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _close(self):
+        self.metadata.close()
+        self.index = None  # faiss 인덱스 해제 → 인덱스 파일 mmap 해제
+        self._filters.clear()
+        self._partitions = None
+        print(f"인덱스 버전 {self.version} 자원 해제")
+
+    def partitions(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """필드 → 값 → chunk ID 배열. 메타데이터를 한 번 훑어 버전마다 한 번만 만듭니다."""
+        if self._partitions is None:
+            with self._filter_lock:
+                if self._partitions is None:
+                    groups = {field: {} for field in FILTER_FIELDS}
+                    for record in self.metadata:
+                        for field in FILTER_FIELDS:
+                            groups[field].setdefault(str(record.get(field) or ""), []).append(record["id"])
+                    self._partitions = {
+                        field: {value: np.array(ids, dtype="int64") for value, ids in values.items()}
+                        for field, values in groups.items()
+                    }
+        return self._partitions
+
+    def resolve_filter(self, filters: Optional[Dict[str, List[str]]]) -> Optional[ResolvedFilter]:
+        """
+        필터({"source": [...], "document": [...], "title": [...]})를 chunk ID 집합과 FAISS selector로 변환합니다.
+        값은 정확히 일치하거나 접두어로 일치하면 매칭되고(예: "data/최신영농활용기술/"),
+        같은 필드 안은 OR, 필드끼리는 AND입니다. 필터가 없으면 None.
+        같은 필터의 ID 배열/selector는 캐시되므로 반복되는 필터 검색은 비필터 검색과 같은 비용으로 처리됩니다.
+        SearchParameters는 IndexIDMap2가 검색 중 sel을 바꿔 끼우므로 캐시하지 않고 search()마다 새로 만듭니다.
+        """
+        filters = {field: sorted(set(values)) for field, values in (filters or {}).items() if values}
+        if not filters:
+            return None
+
+        key = json.dumps(filters, ensure_ascii=False, sort_keys=True)
+        with self._filter_lock:
+            resolved = self._filters.get(key)
+            if resolved is not None:
+                self._filters.move_to_end(key)
+                return resolved
+
+        partitions = self.partitions()
+        ids, values = None, {}
+        for field, wanted in filters.items():
+            if field not in partitions:
+                raise ValueError(f"지원하지 않는 필터 필드: {field}")
+            matched = [value for value in partitions[field] if any(value.startswith(w) for w in wanted)]
+            field_ids = (
+                np.unique(np.concatenate([partitions[field][value] for value in matched]))
+                if matched else np.empty(0, dtype="int64")
+            )
+            ids = field_ids if ids is None else np.intersect1d(ids, field_ids, assume_unique=True)
+            values[field] = matched
+
+        selector = faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids)) if len(ids) else None
+        resolved = ResolvedFilter(ids, values, selector)
+
+        with self._filter_lock:
+            self._filters[key] = resolved
+            while len(self._filters) > FILTER_CACHE_SIZE:
+                self._filters.popitem(last=False)
+        return resolved
+
+    def search(self, query_vec: np.ndarray, top_k: int = 15,
+               filters: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+        resolved = self.resolve_filter(filters)
+        if resolved is not None and not len(resolved.ids):
+            return []
+
+        # 인덱스는 정규화된 벡터의 inner product → score가 곧 cosine similarity
+        if resolved is None:
+            D, I = self.index.search(query_vec, top_k)
+        else:
+            # 요청마다 새 파라미터 (캐시된 selector는 참조만 하므로 resolved가 살아 있는 동안 유효)
+            params = search_parameters(self.index, resolved.selector)
+            D, I = self.index.search(query_vec, top_k, params=params)
+
+        results = []
+        for i, score in zip(I[0], D[0]):
+            if i < 0:
+                continue
+            record = self.metadata.get(int(i))
+            if record is not None:
+                results.append({
+                    **record,
+                    "text": record.get("text", ""),
+                    "similarity": float(score)
+                })
+        return results
+
+    def warm_up(self):
+        """교체 전에 인덱스/메타데이터 페이지를 미리 읽고 필터용 파티션을 만들어 첫 요청 지연을 줄입니다."""
+        query = np.zeros((1, self.index.d), dtype="float32")
+        query[0, 0] = 1.0
+        self.search(query, top_k=8)
+        self.partitions()
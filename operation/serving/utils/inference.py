@@ -1,99 +1,209 @@
-from .reranker import load_reranker, rerank_with_bge
-from .search import vector_search
-from dto.routings import RoutingResult, RouteType
-
-from .buffer import save_session_memory
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage
-from transformers import AutoTokenizer
-
-from typing import Dict, Any, List
+from .reranker import load_reranker, rerank_batch
+from .search import (
+    vector_search, embed_queries, acurrent_searcher, leased_searcher, with_searcher, reciprocal_rank_fusion
+)
+from .lexical import lexical_search, LEXICAL_BACKEND
+from .lifecycle import LazyResource
+from .batcher import MicroBatcher
+from .cache import QueryCache
+from .semantic_cache import SemanticAnswerCache
+from .embedding import EMBEDDING_MODEL, EMBEDDING_BACKEND
+from .routing import route_query
+from dto.routings import RoutingResult
+
+from .buffer import AsyncRedisHistory
+from .clients import clients, END_OF_TURN
+from .executors import embed_executor, rerank_executor, lexical_executor, run_in
+from langchain_core.messages import HumanMessage, AIMessage
+from .tokens import tokenizer, trim_history, with_token_count
+
+from typing import Dict, Any, List, AsyncIterator, NamedTuple, Optional
+from contextlib import contextmanager
+import asyncio
+import json
+import os
+import time
+
+# 라우팅과 검색을 동시에 수행 (0이면 라우팅 후 순차 검색)
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "1") == "1"
+
+reranker = LazyResource("reranker", load_reranker)
+
+# 하이브리드 검색: 벡터/BM25 각각 SEARCH_TOP_K개를 동시에 검색해 RRF로 합친 상위 HYBRID_CANDIDATES개를 리랭킹
+SEARCH_TOP_K = int(os.getenv("SEARCH_TOP_K", "8"))
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "12"))
+
+
+# 동시 요청의 쿼리 임베딩/리랭킹을 모아서 한 번의 forward로 처리
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "3"))
+# 배치기별로 동시에 실행할 배치 수 (기본값은 EMBED_WORKERS / RERANK_WORKERS 기본값과 같음)
+EMBED_BATCH_CONCURRENCY = int(os.getenv("EMBED_BATCH_CONCURRENCY", "2"))
+RERANK_BATCH_CONCURRENCY = int(os.getenv("RERANK_BATCH_CONCURRENCY", "2"))
+
+embed_batcher = MicroBatcher(
+    lambda queries: list(embed_queries(queries)),
+    embed_executor, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS,
+    max_concurrency=EMBED_BATCH_CONCURRENCY, name="embed"
+)
+rerank_batcher = MicroBatcher(
+    lambda jobs: rerank_batch(jobs, reranker.get()),
+    rerank_executor, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS,
+    max_concurrency=RERANK_BATCH_CONCURRENCY, name="rerank"
+)
+
+# 쿼리 임베딩 / 리랭크 결과 캐시 (QUERY_CACHE_REDIS=1이면 앱 시작 시 Redis 공유 캐시 연결)
+QUERY_CACHE_REDIS = os.getenv("QUERY_CACHE_REDIS", "0") == "1"
+query_cache = QueryCache(
+    model_key=f"{EMBEDDING_MODEL}:{EMBEDDING_BACKEND}",
+    maxsize=int(os.getenv("QUERY_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("QUERY_CACHE_TTL", "3600"))
+)
+
+# 의미적으로 거의 같은 질문 + 같은 references면 이전 답변 재사용 (대화 기록이 있는 세션은 제외)
+SEMANTIC_CACHE = os.getenv("SEMANTIC_CACHE", "1") == "1"
+semantic_cache = SemanticAnswerCache(
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+    maxsize=int(os.getenv("SEMANTIC_CACHE_SIZE", "5000")),
+    ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "86400"))
+)
+
+
+class Retrieval(NamedTuple):
+    routing: RoutingResult
+    references: List[Dict[str, Any]]
+    query_vec: Any
+    index_version: str
+
+
+@contextmanager
+def timed(timings: Dict[str, float], stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round((time.perf_counter() - start) * 1000, 2)
 
-reranker = load_reranker()
 
-tokenizer = AutoTokenizer.from_pretrained("unsloth/gemma-3-4b-it", trust_remote_code=True)
+def filter_scope(filters: Optional[Dict[str, List[str]]]) -> str:
+    """검색 필터를 캐시 키에 붙일 문자열로 변환합니다. 필터가 없으면 빈 문자열."""
+    filters = {field: sorted(values) for field, values in (filters or {}).items() if values}
+    return f":{json.dumps(filters, ensure_ascii=False, sort_keys=True)}" if filters else ""
 
 
-def count_tokens(messages: List) -> int:
-    total_tokens = 0
-    for message in messages:
-        if hasattr(message, 'content'):
-            total_tokens += len(tokenizer.encode(message.content))
+async def search_references(query: str, query_vec, timings: Dict[str, float],
+                            filters: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+    with timed(timings, "search_ms"):
+        if LEXICAL_BACKEND == "off":
+            candidates = await run_in(
+                embed_executor, vector_search, query, top_k=SEARCH_TOP_K, query_vec=query_vec, filters=filters
+            )
         else:
-            total_tokens += len(tokenizer.encode(str(message)))
-    return total_tokens
+            # 벡터/BM25 검색을 같은 인덱스 버전으로 동시에 실행 → 지연은 둘 중 느린 쪽 수준
+            await acurrent_searcher()  # 최초 로드는 이벤트 루프 밖에서
+            with leased_searcher() as searcher:
+                vector_results, lexical_results = await asyncio.gather(
+                    run_in(embed_executor, with_searcher, searcher, searcher.search, query_vec, SEARCH_TOP_K, filters),
+                    run_in(lexical_executor, with_searcher, searcher, lexical_search, query, searcher,
+                           top_k=SEARCH_TOP_K, filters=filters)
+                )
+            candidates = reciprocal_rank_fusion([vector_results, lexical_results], top_n=HYBRID_CANDIDATES)
+    with timed(timings, "rerank_ms"):
+        reranked = await rerank_batcher.submit((query, candidates, 5))
+
+    return [
+        {
+            "document": doc.get("document"),
+            "text": doc.get("text"),
+            "score": score
+        }
+        for doc, score in reranked if score > 0.5
+    ]
 
 
-def route_query(query: str) -> RoutingResult:
-    llm = ChatOpenAI(
-        model_name="unsloth/gemma-3-4b-it",
-        openai_api_base="http://localhost:8000/v1",
-        max_tokens=30,
-        temperature=0,
-        openai_api_key="sk-fake-key",
-    )
+def discard_task(task: asyncio.Task):
+    """결과를 쓰지 않을 작업을 취소하고, 그 예외가 "Task exception was never retrieved"로 남지 않도록 소비합니다."""
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
 
-    prompt = f"""이 질문이 농업 전문 지식/문서 검색이 필요한지 판단하세요.
 
-질문: "{query}"
+async def retrieve_references(query: str, timings: Dict[str, float] = None,
+                              filters: Optional[Dict[str, List[str]]] = None) -> Retrieval:
+    """
+    SPECULATIVE_RETRIEVAL이 켜져 있으면 라우팅과 검색/리랭킹을 동시에 시작하고,
+    라우팅 결과가 general_chat이면 검색 결과를 버립니다. (대부분의 트래픽이 document_search)
+    filters({"source": [...], "document": [...], "title": [...]})가 있으면 해당 chunk 안에서만 검색합니다.
+    """
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
 
-농업 기술, 작물 재배, 병해충, 농약 등 전문 정보가 필요하면 "농업검색"
-일반 대화, 인사, 감사 등은 "일반대화"
+    # 쿼리 임베딩은 한 번만 계산해 라우팅과 벡터 검색에 함께 사용
+    with timed(timings, "embed_ms"):
+        query_vec = await query_cache.get_embedding(query)
+        if query_vec is None:
+            query_vec = (await embed_batcher.submit(query)).reshape(1, -1)
+            await query_cache.set_embedding(query, query_vec)
 
-답변: """
+    index_version = (await acurrent_searcher()).version
+    scope = filter_scope(filters)
+    cached_references = await query_cache.get_references(query, index_version, scope)
+
+    retrieval = None
+    if SPECULATIVE_RETRIEVAL and cached_references is None:
+        retrieval = asyncio.create_task(search_references(query, query_vec, timings, filters))
 
     try:
-        response = llm.invoke(prompt)
-        content = response.content.strip()
+        with timed(timings, "route_ms"):
+            routing: RoutingResult = await route_query(query, query_vec)
+    except BaseException:
+        if retrieval is not None:
+            discard_task(retrieval)
+        raise
+    print(f"라우팅: {routing['route']} - {routing['reasoning']}")
 
-        if "농업검색" in content:
-            route: RouteType = "document_search"
-            reasoning = "농업 전문 지식 필요"
-        else:
-            route = "general_chat"
-            reasoning = "일반 대화"
+    if routing["route"] != "document_search":
+        print(f"일반 대화: {query}")
+        if retrieval is not None:
+            discard_task(retrieval)  # 이미 실행 중인 executor 작업은 끝나더라도 결과는 사용하지 않음
+        references = []
+    elif cached_references is not None:
+        print(f"농업 검색 캐시 사용: {query}")
+        references = cached_references
+    else:
+        print(f"농업 검색 수행: {query}")
+        references = await (retrieval or search_references(query, query_vec, timings, filters))
+        await query_cache.set_references(query, index_version, references, scope)
 
-        return RoutingResult(route=route, reasoning=reasoning)
+    timings["retrieval_total_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    print(f"단계별 소요시간(ms): {timings}")
+    return Retrieval(routing, references, query_vec, index_version)
 
-    except Exception as e:
-        return RoutingResult(route="document_search", reasoning=f"라우팅 오류: {str(e)}")
 
+def semantic_cacheable(retrieval: Retrieval, previous_messages: List) -> bool:
+    # 이전 대화가 있으면 같은 질문이라도 답변이 문맥에 따라 달라지므로 캐시하지 않음
+    return SEMANTIC_CACHE and not previous_messages and retrieval.routing["route"] == "document_search"
 
-def generate_response(query: str, session_id: str) -> Dict[str, Any]:
-    memory = save_session_memory(session_id, "redis://192.168.0.150:6379")
-    if memory is None:
-        return {"error": "메모리 초기화 실패"}
 
-    input_query = len(tokenizer.encode(query))
-    routing: RoutingResult = route_query(query)
-    print(f"라우팅: {routing['route']} - {routing['reasoning']}")
+def lookup_semantic_answer(retrieval: Retrieval, previous_messages: List) -> Optional[str]:
+    if not semantic_cacheable(retrieval, previous_messages):
+        return None
+    hit = semantic_cache.lookup(retrieval.query_vec, retrieval.references, retrieval.index_version)
+    if hit is None:
+        return None
+    print(f"의미 캐시 사용 (유사도 {hit['similarity']:.3f}): {hit['query']}")
+    return hit["answer"]
 
-    if routing["route"] == "document_search":
-        print(f"농업 검색 수행: {query}")
-        vector_results = vector_search(query, top_k=8)
-        reranked = rerank_with_bge(query, vector_results, reranker, top_k=5)
-
-        references = [
-            {
-                "document": doc.get("document"),
-                "text": doc.get("text"),
-                "score": score
-            }
-            for doc, score in reranked if score > 0.5
-        ]
-    else:
-        print(f"일반 대화: {query}")
-        references = []
 
+def build_prompt(query: str, references: List[Dict[str, Any]]) -> str:
     if not references:
-        prompt = f"""사용자의 질문에 대해 자세히 설명하세요.:
+        return f"""사용자의 질문에 대해 자세히 설명하세요.:
 
         [질문]
         {query}
         """
-    else:
-        context = "\n".join([ref["text"] for ref in references])
-        prompt = f"""아래 문서를 참고해서 사용자의 질문에 대해 자세히 설명하세요.:
+
+    context = "\n".join([ref["text"] for ref in references])
+    return f"""아래 문서를 참고해서 사용자의 질문에 대해 자세히 설명하세요.:
         [문서 요약]
         {context}
         
@@ -101,60 +211,130 @@ def generate_response(query: str, session_id: str) -> Dict[str, Any]:
         {query}
         """
 
-    llm = ChatOpenAI(
-        model_name="unsloth/gemma-3-4b-it",
-        openai_api_base="http://localhost:8000/v1",
-        max_tokens=1024,
-        temperature=0.7,
-        openai_api_key="sk-fake-key",
-        model_kwargs={
-            "stop": ["<end_of_turn>"],
-            "frequency_penalty": 0.2
-        }
-    )
-
-    previous_messages = memory.load_memory_variables({}).get("chat_history", [])
 
+def build_messages(previous_messages: List, prompt: str) -> List:
     current_messages = [
         HumanMessage(content="당신은 한국어로만 답변하는 전문 농업 상담가입니다. 절대로 외국어를 섞지 말고, 반드시 한국어로만 답변하세요.\n\n" + prompt)
     ]
 
-    all_messages = previous_messages + current_messages
+    all_messages, _ = trim_history(previous_messages, current_messages, max_tokens=2500)
+    return all_messages
 
-    print(f"DEBUG: 초기 토큰 수: {count_tokens(all_messages)}")
 
-    max_tokens = 2500
-    while count_tokens(all_messages) > max_tokens and len(previous_messages) > 0:
-        if len(previous_messages) >= 2:
-            previous_messages.pop(0)
-            previous_messages.pop(0)
-        else:
-            previous_messages.clear()
-        all_messages = previous_messages + current_messages
-        print(f"대화 쌍 삭제, 현재 토큰: {count_tokens(all_messages)}")
+def session_turn(query: str, answer: str) -> List:
+    # 저장 시점에 토큰 수를 함께 기록해 다음 요청에서 다시 인코딩하지 않도록 함
+    return [with_token_count(HumanMessage(content=query)), with_token_count(AIMessage(content=answer))]
 
-    print(f"DEBUG: 최종 토큰 수: {count_tokens(all_messages)}")
 
-    response = llm.invoke(all_messages)
-    
-    # 응답 정리
-    cleaned_answer = response.content.split("<end_of_turn>")[0].strip()
+def clean_answer(content: str) -> str:
+    cleaned_answer = content.split(END_OF_TURN)[0].strip()
     if not cleaned_answer.endswith('.'):
         sentences = cleaned_answer.split('.')
         if len(sentences) > 1 and len(sentences[-1].strip()) < 10:
             cleaned_answer = '.'.join(sentences[:-1]) + '.'
-    
-    memory.save_context(
-        {"input": query},
-        {"output": cleaned_answer}
-    )
+    return cleaned_answer
+
+
+async def generate_response(query: str, session_id: str,
+                            filters: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+    memory = AsyncRedisHistory(session_id)
+
+    input_query = len((await tokenizer.aget()).encode(query))
+    timings: Dict[str, float] = {}
+    retrieval = await retrieve_references(query, timings, filters)
+    references = retrieval.references
+    previous_messages = await memory.aget_messages()
+
+    cleaned_answer = lookup_semantic_answer(retrieval, previous_messages)
+    completion_tokens = 0
+    if cleaned_answer is None:
+        all_messages = build_messages(previous_messages, build_prompt(query, references))
+        with timed(timings, "generate_ms"):
+            response = await clients.get_chat_llm().ainvoke(all_messages)
+
+        # 응답 정리
+        cleaned_answer = clean_answer(response.content)
+        completion_tokens = response.response_metadata.get("token_usage", {}).get("completion_tokens", 0)
+        if semantic_cacheable(retrieval, previous_messages):
+            semantic_cache.store(retrieval.query_vec, references, retrieval.index_version, query, cleaned_answer)
 
-    token_usage = response.response_metadata.get("token_usage", {})
+    await memory.aadd_messages(session_turn(query, cleaned_answer))
 
     return {
         "answer": cleaned_answer,
         "input_tokens": input_query,
-        "completion_tokens": token_usage.get("completion_tokens", 0),
+        "completion_tokens": completion_tokens,
         "references": references[0]["document"] if references else "",
-        "rank": references
+        "rank": references,
+        "timings": timings
     }
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_response(query: str, session_id: str,
+                          filters: Optional[Dict[str, List[str]]] = None) -> AsyncIterator[str]:
+    """
+    SSE 스트리밍 응답: references → token(여러 번) → done 순서로 이벤트를 보냅니다.
+    <end_of_turn>이 청크 경계에 걸려 일부만 보내지는 일이 없도록 마커의 접두어일 수 있는 꼬리는 보류합니다.
+    """
+    memory = AsyncRedisHistory(session_id)
+
+    input_query = len((await tokenizer.aget()).encode(query))
+    timings: Dict[str, float] = {}
+    retrieval = await retrieve_references(query, timings, filters)
+    references = retrieval.references
+    yield sse_event("references", {
+        "input_tokens": input_query,
+        "references": references[0]["document"] if references else "",
+        "rank": references,
+        "timings": timings
+    })
+
+    previous_messages = await memory.aget_messages()
+    cached_answer = lookup_semantic_answer(retrieval, previous_messages)
+    if cached_answer is not None:
+        yield sse_event("token", {"content": cached_answer})
+        await memory.aadd_messages(session_turn(query, cached_answer))
+        yield sse_event("done", {"answer": cached_answer, "completion_tokens": 0})
+        return
+
+    all_messages = build_messages(previous_messages, build_prompt(query, references))
+
+    text, sent, completion_tokens = "", 0, 0
+    async for chunk in clients.get_chat_llm().astream(all_messages):
+        if chunk.usage_metadata:
+            completion_tokens = chunk.usage_metadata.get("output_tokens", completion_tokens)
+        text += chunk.content
+
+        end = text.find(END_OF_TURN)
+        if end >= 0:
+            text = text[:end]
+            safe = end
+        else:
+            safe = len(text) - _marker_prefix_length(text)
+        if safe > sent:
+            yield sse_event("token", {"content": text[sent:safe]})
+            sent = safe
+        if end >= 0:
+            break
+
+    if len(text) > sent:
+        yield sse_event("token", {"content": text[sent:]})
+
+    cleaned_answer = clean_answer(text)
+    if semantic_cacheable(retrieval, previous_messages):
+        semantic_cache.store(retrieval.query_vec, references, retrieval.index_version, query, cleaned_answer)
+    await memory.aadd_messages(session_turn(query, cleaned_answer))
+
+    yield sse_event("done", {"answer": cleaned_answer, "completion_tokens": completion_tokens})
+
+
+def _marker_prefix_length(text: str) -> int:
+    """text 끝부분 중 END_OF_TURN의 접두어와 일치하는 최대 길이."""
+    for length in range(min(len(END_OF_TURN) - 1, len(text)), 0, -1):
+        if END_OF_TURN.startswith(text[-length:]):
+            return length
+    return 0
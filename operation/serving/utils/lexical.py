@@ -0,0 +1,173 @@
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+import numpy as np
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .clients import clients
+from .index import Searcher, ResolvedFilter
+
+# 하이브리드 검색의 BM25 백엔드
+#   meilisearch : Vector 쪽 sync_meilisearch로 색인된 Meilisearch 인덱스 (기본)
+#   bm25        : 현재 인덱스 버전의 메타데이터로 프로세스 내 BM25 인덱스를 만들어 사용 (Meilisearch 대체)
+#   off         : 벡터 검색만 사용
+LEXICAL_BACKEND = os.getenv("LEXICAL_BACKEND", "meilisearch")
+MEILI_INDEX = os.getenv("MEILI_INDEX", "chunks")
+# 접두어 필터가 매칭한 값이 이보다 많은 필드는 IN 목록으로 보내지 않고, 더 많이 가져와 ID로 후처리
+MEILI_FILTER_MAX_VALUES = int(os.getenv("MEILI_FILTER_MAX_VALUES", "100"))
+MEILI_OVERFETCH = int(os.getenv("MEILI_OVERFETCH", "5"))
+
+_TOKEN_PATTERN = re.compile(r"[0-9a-z가-힣]+(?:[.,][0-9]+)*")
+_HANGUL = re.compile(r"[가-힣]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    공백/기호 단위 토큰 + 한글 토큰의 글자 bigram.
+    형태소 분석 없이도 조사가 붙은 어절("만코제브를")과 원형("만코제브")이 bigram으로 매칭되고,
+    약제명/품종명/희석배수 같은 숫자 토큰("1,000배")은 그대로 보존됩니다.
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text):
+        tokens.append(token)
+        if len(token) > 2 and _HANGUL.search(token):
+            tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+    return tokens
+
+
+class BM25Index:
+    """chunk 메타데이터로 만드는 메모리 내 BM25 역색인 (Meilisearch가 없을 때의 대체 구현)."""
+
+    def __init__(self, records: Iterable[Dict], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+        postings = defaultdict(list)
+        ids, lengths = [], []
+        for doc, record in enumerate(records):
+            terms = Counter(tokenize(f"{record.get('title') or ''} {record.get('text', '')}"))
+            for term, tf in terms.items():
+                postings[term].append((doc, tf))
+            ids.append(record["id"])
+            lengths.append(sum(terms.values()))
+
+        self.ids = np.array(ids, dtype="int64")
+        self.lengths = np.array(lengths, dtype="float32")
+        self.avg_length = float(self.lengths.mean()) if len(lengths) else 0.0
+        # term → (문서 위치 배열, tf 배열)
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {
+            term: (np.array([d for d, _ in docs], dtype="int32"), np.array([tf for _, tf in docs], dtype="float32"))
+            for term, docs in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, top_k: int = 8, allowed: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """allowed(정렬된 chunk ID 배열)가 있으면 점수가 있는 문서 중 해당 ID만 남깁니다."""
+        if not len(self.ids):
+            return []
+
+        scores = np.zeros(len(self.ids), dtype="float32")
+        norm = self.k1 * (1 - self.b + self.b * self.lengths / max(self.avg_length, 1e-9))
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            docs, tf = posting
+            idf = math.log(1 + (len(self.ids) - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm[docs])
+
+        candidates = np.flatnonzero(scores)
+        if allowed is not None:
+            candidates = candidates[np.isin(self.ids[candidates], allowed, assume_unique=True)]
+        top_k = min(top_k, len(candidates))
+        if top_k == 0:
+            return []
+        top = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.ids[i]), float(scores[i])) for i in top]
+
+
+_local_index: Optional[Tuple[str, BM25Index]] = None
+_local_lock = threading.Lock()
+
+
+def local_bm25(searcher: Searcher) -> BM25Index:
+    """인덱스 버전별로 한 번만 BM25 인덱스를 구축합니다. 버전이 바뀌면 다시 만듭니다."""
+    global _local_index
+    cached = _local_index
+    if cached is not None and cached[0] == searcher.version:
+        return cached[1]
+
+    with _local_lock:
+        if _local_index is None or _local_index[0] != searcher.version:
+            bm25 = BM25Index(searcher.metadata)
+            print(f"로컬 BM25 인덱스 구축 완료: {len(bm25)}개 chunk (버전 {searcher.version})")
+            _local_index = (searcher.version, bm25)
+        return _local_index[1]
+
+
+def meili_filter(resolved: ResolvedFilter) -> Tuple[Optional[str], bool]:
+    """
+    Searcher가 해석한 필터 값을 Meilisearch 필터 식으로 변환합니다.
+    값이 MEILI_FILTER_MAX_VALUES개를 넘는 필드는 식에서 빼고, 두 번째 반환값으로 후처리가 필요함을 알립니다.
+    """
+    clauses, partial = [], False
+    for field, values in resolved.values.items():
+        if len(values) > MEILI_FILTER_MAX_VALUES:
+            partial = True
+            continue
+        clauses.append(f"{field} IN [{', '.join(json.dumps(value, ensure_ascii=False) for value in values)}]")
+    return (" AND ".join(clauses) or None), partial
+
+
+def lexical_search(query: str, searcher: Searcher, top_k: int = 8,
+                   filters: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+    """BM25 검색 결과를 벡터 검색과 같은 형태(메타데이터 + id)로 반환합니다. 실패하면 빈 목록."""
+    if LEXICAL_BACKEND == "off":
+        return []
+
+    resolved = searcher.resolve_filter(filters)
+    if resolved is not None and not len(resolved.ids):
+        return []
+
+    try:
+        if LEXICAL_BACKEND == "bm25":
+            allowed = resolved.ids if resolved is not None else None
+            results = []
+            for chunk_id, score in local_bm25(searcher).search(query, top_k, allowed):
+                record = searcher.metadata.get(chunk_id)
+                if record is not None:
+                    results.append({**record, "bm25_score": score})
+            return results
+
+        options = {
+            "limit": top_k,
+            "showRankingScore": True,
+            "attributesToRetrieve": ["id", "title", "text", "chunk_id", "document", "source"]
+        }
+        partial = False
+        if resolved is not None:
+            expression, partial = meili_filter(resolved)
+            if expression:
+                options["filter"] = expression
+            if partial:
+                options["limit"] = top_k * MEILI_OVERFETCH
+        response = clients.get_meili().index(MEILI_INDEX).search(query, options)
+        hits = response["hits"]
+        if partial:
+            allowed = np.isin(np.array([hit["id"] for hit in hits], dtype="int64"), resolved.ids)
+            hits = [hit for hit, ok in zip(hits, allowed) if ok][:top_k]
+        return [
+            {**{k: v for k, v in hit.items() if k != "_rankingScore"}, "bm25_score": hit.get("_rankingScore")}
+            for hit in hits
+        ]
+    except Exception as e:
+        print(f"BM25 검색 실패, 벡터 검색 결과만 사용: {e}")
+        return []
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+class LazyResource:
+    """
+    모델/인덱스처럼 로드가 무거운 자원을 import 시점이 아니라 처음 필요할 때(또는 warm_up_all에서) 로드합니다.
+    생성된 LazyResource는 모두 등록되어 /readyz에서 상태를 확인할 수 있습니다.
+    """
+
+    _registry: List["LazyResource"] = []
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self.loader = loader
+        self._value: Any = None
+        self._loaded = False
+        self._error: Optional[str] = None
+        self._load_ms: Optional[float] = None
+        self._lock = threading.Lock()
+        LazyResource._registry.append(self)
+
+    def get(self) -> Any:
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                try:
+                    self._value = self.loader()
+                except Exception as e:
+                    self._error = str(e)
+                    raise
+                self._load_ms = round((time.perf_counter() - start) * 1000, 1)
+                self._loaded = True
+                self._error = None
+                print(f"{self.name} 로드 완료 ({self._load_ms}ms)")
+        return self._value
+
+    async def aget(self) -> Any:
+        """이벤트 루프에서 사용: 아직 로드 전이면 스레드에서 로드해 루프를 막지 않습니다."""
+        if self._loaded:
+            return self._value
+        return await asyncio.to_thread(self.get)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def status(self) -> Dict[str, Any]:
+        if self._loaded:
+            return {"status": "ready", "load_ms": self._load_ms}
+        if self._error is not None:
+            return {"status": "failed", "error": self._error}
+        return {"status": "loading" if self._lock.locked() else "pending"}
+
+
+def warm_up_all(max_workers: int = 4) -> Dict[str, Dict[str, Any]]:
+    """등록된 자원을 스레드풀에서 병렬로 로드합니다. 실패한 자원은 상태에 기록하고 나머지는 계속 로드합니다."""
+    def load(resource: LazyResource):
+        try:
+            resource.get()
+        except Exception as e:
+            print(f"{resource.name} 로드 실패: {e}")
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="warmup") as executor:
+        list(executor.map(load, LazyResource._registry))
+    return readiness()
+
+
+def readiness() -> Dict[str, Dict[str, Any]]:
+    return {resource.name: resource.status() for resource in LazyResource._registry}
+
+
+def is_ready() -> bool:
+    return all(resource.loaded for resource in LazyResource._registry)
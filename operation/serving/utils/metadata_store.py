@@ -0,0 +1,45 @@
+import json
+import mmap
+import os
+import numpy as np
+from typing import Dict, Iterator, Optional
+
+METADATA_BLOB = "metadata.bin"
+METADATA_IDS = "metadata.ids.npy"
+METADATA_OFFSETS = "metadata.offsets.npy"
+
+
+class MetadataStore:
+    """
+    Vector 쪽 write_metadata_store가 만든 blob + offsets 메타데이터를 mmap으로 읽습니다.
+    파일 페이지는 OS 페이지 캐시를 통해 워커 간에 공유되고, 조회한 행만 JSON으로 디코딩합니다.
+    """
+
+    def __init__(self, index_dir: str):
+        self.ids = np.load(os.path.join(index_dir, METADATA_IDS), mmap_mode="r")
+        self.offsets = np.load(os.path.join(index_dir, METADATA_OFFSETS), mmap_mode="r")
+
+        self._file = open(os.path.join(index_dir, METADATA_BLOB), "rb")
+        if os.fstat(self._file.fileno()).st_size:
+            self._blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._blob = b""
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, chunk_id: int) -> Optional[Dict]:
+        pos = int(np.searchsorted(self.ids, chunk_id))
+        if pos >= len(self.ids) or self.ids[pos] != chunk_id:
+            return None
+        return json.loads(self._blob[self.offsets[pos]:self.offsets[pos + 1]])
+
+    def __iter__(self) -> Iterator[Dict]:
+        # 전체 순회 (로컬 BM25 인덱스 구축용)
+        for pos in range(len(self.ids)):
+            yield json.loads(self._blob[self.offsets[pos]:self.offsets[pos + 1]])
+
+    def close(self):
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._file.close()
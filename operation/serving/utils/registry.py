@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from .clients import clients
+from .index import Searcher
+
+
+# 버전 ID는 로컬 캐시 경로에 그대로 쓰이므로 경로 구분자/상위 디렉토리 참조를 허용하지 않음
+_VERSION_PATTERN = re.compile(r"[\w.-]+")
+
+
+def validate_version(version) -> str:
+    if not isinstance(version, str) or not _VERSION_PATTERN.fullmatch(version) or version in (".", ".."):
+        raise ValueError(f"잘못된 인덱스 버전: {version!r}")
+    return version
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IndexRegistry:
+    """
+    MinIO에 버전별로 게시된 인덱스(Embedder.upload_to_minio)를 받아 무중단으로 교체합니다.
+      {prefix}/latest.json                       : {"version": ..., "previous": ...}
+      {prefix}/versions/{version}/manifest.json  : 파일별 sha256/크기
+    새 버전은 백그라운드에서 다운로드 → 체크섬 검증 → 로드/웜업 후 current 참조를 한 번에 바꿉니다.
+    요청 처리 중인 스레드는 lease()로 잡은 Searcher를 끝까지 사용하므로 교체 중에도 요청이 끊기지 않고,
+    current/previous에서 밀려난 Searcher는 잡고 있는 요청이 모두 끝나면 닫힙니다.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        bucket: str = "vector",
+        prefix: str = "index/faiss/",
+        poll_interval: float = 0,
+        keep_versions: int = 3,
+        client=None
+    ):
+        self.cache_dir = cache_dir
+        self.bucket = bucket
+        self.prefix = prefix.rstrip("/")
+        self.poll_interval = poll_interval
+        self.keep_versions = keep_versions
+        self._client = client
+
+        self.current: Optional[Searcher] = None
+        self.previous: Optional[Searcher] = None
+        self.pinned = False  # 특정 버전/롤백 상태면 폴링으로 최신 버전을 따라가지 않음
+        self._retired: List[Searcher] = []  # 밀려났지만 진행 중인 검색이 남아 아직 닫히지 않은 버전
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def client(self):
+        # 기본은 앱 전체 공유 boto3 클라이언트 (MinIO 접근이 필요할 때 생성)
+        if self._client is None:
+            self._client = clients.get_s3()
+        return self._client
+
+    # ---- 로드 / 교체 ----
+    def load_local(self, index_dir: str) -> Searcher:
+        """로컬 디렉토리의 인덱스를 현재 버전으로 로드합니다. manifest.json이 있으면 그 버전 ID를 사용합니다."""
+        version = "local"
+        manifest_path = os.path.join(index_dir, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                version = json.load(f).get("version", version)
+
+        searcher = Searcher(index_dir, version=version)
+        searcher.warm_up()
+        self._swap(searcher)
+        return searcher
+
+    def load_initial(self, index_dir: str) -> Searcher:
+        """앱 시작 시 로컬 인덱스를 로드합니다. 폴링/refresh로 이미 활성화된 버전이 있으면 덮어쓰지 않습니다."""
+        with self._lock:
+            if self.current is not None:
+                return self.current
+            return self.load_local(index_dir)
+
+    def latest_version(self) -> Optional[str]:
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=f"{self.prefix}/latest.json")
+            version = json.loads(obj["Body"].read()).get("version")
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return validate_version(version) if version is not None else None
+
+    def fetch(self, version: str) -> str:
+        """버전 파일을 로컬 캐시에 받고 체크섬을 검증합니다. 이미 받은 버전이면 그대로 사용합니다."""
+        validate_version(version)
+        version_dir = os.path.join(self.cache_dir, "versions", version)
+        if os.path.exists(os.path.join(version_dir, "manifest.json")):
+            return version_dir
+
+        key_prefix = f"{self.prefix}/versions/{version}"
+        manifest = json.loads(
+            self.client.get_object(Bucket=self.bucket, Key=f"{key_prefix}/manifest.json")["Body"].read()
+        )
+
+        tmp_dir = f"{version_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for file_name, info in manifest["files"].items():
+            path = os.path.join(tmp_dir, file_name)
+            self.client.download_file(self.bucket, f"{key_prefix}/{file_name}", path)
+            if file_sha256(path) != info["sha256"]:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                raise ValueError(f"체크섬 불일치: {version}/{file_name}")
+
+        with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_dir, version_dir)  # 검증이 끝난 디렉토리만 캐시에 노출
+        return version_dir
+
+    def activate(self, version: str) -> Searcher:
+        version_dir = self.fetch(version)
+        searcher = Searcher(version_dir, version=version)
+        searcher.warm_up()
+        self._swap(searcher)
+        self._prune()
+        return searcher
+
+    def refresh(self, version: Optional[str] = None) -> Optional[str]:
+        """
+        version이 없으면 latest.json의 버전을 따라가고(고정 해제), 있으면 해당 버전으로 고정합니다.
+        교체된 버전 ID를 반환하며, 이미 최신이면 None.
+        고정 상태는 교체가 성공했을 때만 바뀌므로, 잘못된/받을 수 없는 버전 요청은 폴링을 멈추지 않습니다.
+        """
+        if version is not None:
+            validate_version(version)
+        with self._lock:
+            target = version or self.latest_version()
+            if target is None or (self.current is not None and self.current.version == target):
+                self.pinned = version is not None
+                return None
+
+            print(f"인덱스 버전 교체 시작: {self.current.version if self.current else None} → {target}")
+            self.activate(target)
+            self.pinned = version is not None
+            print(f"인덱스 버전 교체 완료: {target}")
+            return target
+
+    def rollback(self) -> Optional[str]:
+        """직전 버전으로 되돌리고 고정합니다."""
+        with self._lock:
+            if self.previous is None:
+                return None
+            self.pinned = True
+            self._swap(self.previous)
+            return self.current.version
+
+    @contextmanager
+    def lease(self) -> Iterator[Searcher]:
+        """요청 동안 현재 버전을 잡아둡니다. 잡고 있는 동안에는 교체되더라도 닫히지 않습니다."""
+        while True:
+            searcher = self.current
+            if searcher is None:
+                raise RuntimeError("활성화된 인덱스가 없습니다.")
+            if searcher.acquire():  # 읽은 직후 교체되어 닫힌 경우에만 실패 → 새 current로 다시 시도
+                break
+        try:
+            yield searcher
+        finally:
+            searcher.release()
+
+    def _swap(self, searcher: Searcher):
+        # 참조 대입은 원자적이므로 진행 중인 요청은 이전 Searcher로 끝까지 처리됨
+        dropped = self.previous
+        self.previous, self.current = self.current, searcher
+        if dropped is not None and dropped is not self.current and dropped is not self.previous:
+            dropped.retire()  # 잡고 있는 요청이 끝나면 mmap을 닫음
+            self._retired.append(dropped)
+        self._retired = [s for s in self._retired if not s.closed]
+
+    def _prune(self):
+        """현재/이전 버전을 제외하고 keep_versions 개를 넘는 오래된 로컬 캐시를 지웁니다."""
+        versions_dir = os.path.join(self.cache_dir, "versions")
+        self._retired = [s for s in self._retired if not s.closed]
+        in_use = {s.version for s in (self.current, self.previous, *self._retired) if s is not None}
+        cached = sorted(
+            (d for d in os.listdir(versions_dir) if not d.endswith(".tmp")),
+            key=lambda d: os.path.getmtime(os.path.join(versions_dir, d))
+        )
+        for version in cached[:-self.keep_versions]:
+            if version not in in_use:
+                shutil.rmtree(os.path.join(versions_dir, version), ignore_errors=True)
+
+    # ---- 폴링 ----
+    def start(self):
+        if self.poll_interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll, name="index-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            if self.pinned:
+                continue
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"인덱스 버전 확인 실패: {e}")
+
+    def status(self) -> Dict:
+        return {
+            "current": self.current.version if self.current else None,
+            "previous": self.previous.version if self.previous else None,
+            "pinned": self.pinned,
+            "retiring": [s.version for s in self._retired if not s.closed],
+        }
@@ -1,35 +1,129 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
-from typing import List, Dict, Tuple
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from typing import List, Dict, Tuple, Optional
+import os
+import torch
 
+# 리랭커 백엔드: torch(기본), int8(torch 동적 양자화, CPU), onnx(ONNX Runtime, optimum 필요)
+RERANKER_BACKEND = os.getenv("RERANKER_BACKEND", "torch")
+RERANKER_DEVICE = os.getenv("RERANKER_DEVICE")  # 미지정 시 CUDA가 있으면 cuda, 없으면 cpu
 
-def load_reranker(model_name: str = "dragonkue/bge-reranker-v2-m3-ko"):
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForSequenceClassification.from_pretrained(model_name)
-    return pipeline(
-        "text-classification",
-        model=model,
-        tokenizer=tokenizer,
-        return_all_scores=False,  # 점수 하나만 반환
-        device=0
-    )
+
+class RerankerEngine:
+    """
+    (질문, 문서)를 실제 sentence pair로 토크나이즈하는 cross-encoder 리랭커.
+    - 질문은 배치 안에서 한 번만 토크나이즈하고 문서 토큰과 special token으로 이어 붙입니다.
+    - 길이순으로 정렬한 미니배치 단위로 실행해 패딩을 줄입니다.
+    - 점수는 text-classification 파이프라인과 같은 sigmoid(logit) 입니다.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "dragonkue/bge-reranker-v2-m3-ko",
+        backend: str = RERANKER_BACKEND,
+        device: Optional[str] = RERANKER_DEVICE,
+        max_length: int = 512,
+        max_query_length: int = 128,
+        batch_size: int = 16
+    ):
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.backend = backend
+        self.max_length = max_length
+        self.max_query_length = max_query_length
+        self.batch_size = batch_size
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+
+        if backend == "onnx":
+            try:
+                from optimum.onnxruntime import ORTModelForSequenceClassification
+            except ImportError as e:
+                raise ImportError("onnx 백엔드는 optimum[onnxruntime] 설치가 필요합니다.") from e
+            self.model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+            self.device = "cpu"
+        else:
+            model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+            if backend == "int8":
+                # 동적 양자화는 CPU 전용
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                self.device = "cpu"
+            elif backend != "torch":
+                raise ValueError(f"지원하지 않는 리랭커 백엔드: {backend}")
+            elif self.device.startswith("cuda"):
+                model = model.half()
+            self.model = model.to(self.device)
+
+    def _encode_pairs(self, pairs: List[Tuple[str, str]]) -> List[List[int]]:
+        queries = list(dict.fromkeys(query for query, _ in pairs))
+        query_ids = dict(zip(queries, self.tokenizer(
+            queries, add_special_tokens=False, truncation=True, max_length=self.max_query_length
+        )["input_ids"]))
+        doc_ids = self.tokenizer(
+            [text for _, text in pairs], add_special_tokens=False, truncation=True, max_length=self.max_length
+        )["input_ids"]
+
+        special = self.tokenizer.num_special_tokens_to_add(pair=True)
+        encoded = []
+        for (query, _), doc in zip(pairs, doc_ids):
+            q = query_ids[query]
+            d = doc[:max(self.max_length - len(q) - special, 0)]
+            encoded.append(self.tokenizer.build_inputs_with_special_tokens(q, d))
+        return encoded
+
+    def score(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        if not pairs:
+            return []
+
+        encoded = self._encode_pairs(pairs)
+        order = sorted(range(len(encoded)), key=lambda i: len(encoded[i]))
+        scores = [0.0] * len(encoded)
+
+        for start in range(0, len(order), self.batch_size):
+            batch_idx = order[start:start + self.batch_size]
+            inputs = self.tokenizer.pad(
+                {"input_ids": [encoded[i] for i in batch_idx]}, padding=True, return_tensors="pt"
+            )
+            with torch.inference_mode():
+                if self.backend != "onnx":
+                    inputs = {k: v.to(self.device) for k, v in inputs.items()}
+                logits = self.model(**inputs).logits.view(-1).float()
+            for i, score in zip(batch_idx, torch.sigmoid(logits).tolist()):
+                scores[i] = score
+        return scores
+
+
+def load_reranker(model_name: str = "dragonkue/bge-reranker-v2-m3-ko") -> RerankerEngine:
+    return RerankerEngine(model_name)
+
+
+def score_pairs(pairs: List[Tuple[str, str]], reranker: RerankerEngine) -> List[float]:
+    return reranker.score(pairs)
 
 
 # Rerank 함수
 def rerank_with_bge(
     query: str,
     docs: List[Dict[str, str]],
-    reranker_pipeline,
+    reranker: RerankerEngine,
     top_k: int = 5
 ) -> List[Tuple[Dict[str, str], float]]:
+    return rerank_batch([(query, docs, top_k)], reranker)[0]
+
+
+def rerank_batch(
+    jobs: List[Tuple[str, List[Dict[str, str]], int]],
+    reranker: RerankerEngine
+) -> List[List[Tuple[Dict[str, str], float]]]:
+    """여러 요청의 (query, docs, top_k)를 한 번의 리랭커 호출로 점수화한 뒤 요청별로 나눠 정렬합니다."""
+    pairs = [(query, doc['text']) for query, docs, _ in jobs for doc in docs]
+    scores = score_pairs(pairs, reranker) if pairs else []
 
-    # 입력 포맷: "질문 [SEP] 문서"
-    pairs = [f"{query} [SEP] {doc['text']}" for doc in docs]
-    scores = reranker_pipeline(pairs)
-
-    # 문서와 점수 묶기
-    ranked = sorted(
-        zip(docs, [score['score'] for score in scores]),
-        key=lambda x: x[1],
-        reverse=True
-    )
-    return ranked[:top_k]
+    results, offset = [], 0
+    for _, docs, top_k in jobs:
+        # 문서와 점수 묶기
+        ranked = sorted(
+            zip(docs, scores[offset:offset + len(docs)]),
+            key=lambda x: x[1],
+            reverse=True
+        )
+        results.append(ranked[:top_k])
+        offset += len(docs)
+    return results
@@ -0,0 +1,104 @@
+import os
+import numpy as np
+from typing import List, Optional, Tuple
+from dto.routings import RoutingResult, RouteType
+from .clients import clients
+from .lifecycle import LazyResource
+
+ROUTER_PATH = os.getenv(
+    "ROUTER_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "artifacts", "query_router.npz")
+)
+# 임베딩 라우터 신뢰도가 이 값보다 낮으면 LLM 라우터로 대체
+ROUTER_CONFIDENCE = float(os.getenv("ROUTER_CONFIDENCE", "0.8"))
+
+# QA 세트에는 일반 대화 예시가 없어 학습용 일반 대화 문장을 함께 둡니다.
+GENERAL_CHAT_EXAMPLES = [
+    "안녕하세요", "안녕하세요 반갑습니다", "반가워요", "처음 뵙겠습니다", "좋은 아침입니다",
+    "안녕히 계세요", "다음에 또 올게요", "수고하세요", "감사합니다", "고맙습니다",
+    "정말 감사해요 도움이 많이 됐어요", "설명 감사합니다", "잘 알겠습니다", "네 알겠어요", "좋아요",
+    "괜찮아요", "아니요 괜찮습니다", "너는 누구야?", "당신은 누구인가요?", "이름이 뭐예요?",
+    "무엇을 도와줄 수 있나요?", "뭐 할 수 있어?", "오늘 날씨 좋네요", "오늘 기분이 좋아요", "심심해요",
+    "농담 하나 해줘", "재미있는 얘기 해주세요", "오늘 무슨 요일이야?", "지금 몇 시야?", "잘 지냈어요?",
+    "요즘 어떻게 지내세요?", "테스트입니다", "테스트", "ㅎㅎ", "ㅋㅋㅋ",
+    "하이", "hello", "hi", "thank you", "수고 많으셨어요",
+    "대답이 너무 길어요", "다시 말해 줄래?", "방금 뭐라고 했어?", "고마워 좋은 하루 보내", "잘 자요",
+]
+
+
+class EmbeddingRouter:
+    """
+    검색용 쿼리 임베딩을 그대로 입력으로 쓰는 로지스틱 회귀 라우터.
+    p(document_search) = sigmoid(w·x + b), 신뢰도는 max(p, 1 - p) 입니다.
+    학습은 train_router.py에서 하고, 서빙은 numpy만 사용합니다.
+    """
+
+    def __init__(self, weight: np.ndarray, bias: float):
+        self.weight = weight.astype("float32").ravel()
+        self.bias = float(bias)
+
+    @classmethod
+    def load(cls, path: str = ROUTER_PATH) -> Optional["EmbeddingRouter"]:
+        if not os.path.exists(path):
+            print(f"임베딩 라우터 없음, LLM 라우터만 사용: {path}")
+            return None
+        data = np.load(path)
+        return cls(data["weight"], float(data["bias"]))
+
+    def save(self, path: str = ROUTER_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path, weight=self.weight, bias=np.float32(self.bias))
+
+    def predict(self, query_vec: np.ndarray) -> Tuple[RouteType, float]:
+        logit = float(np.ravel(query_vec) @ self.weight + self.bias)
+        p = 1.0 / (1.0 + np.exp(-logit))
+        if p >= 0.5:
+            return "document_search", p
+        return "general_chat", 1.0 - p
+
+    def predict_batch(self, query_vecs: np.ndarray) -> List[RouteType]:
+        logits = query_vecs @ self.weight + self.bias
+        return ["document_search" if logit >= 0 else "general_chat" for logit in logits]
+
+
+embedding_router = LazyResource("query_router", EmbeddingRouter.load)
+
+
+async def route_query_llm(query: str) -> RoutingResult:
+    llm = clients.get_router_llm()
+
+    prompt = f"""이 질문이 농업 전문 지식/문서 검색이 필요한지 판단하세요.
+
+질문: "{query}"
+
+농업 기술, 작물 재배, 병해충, 농약 등 전문 정보가 필요하면 "농업검색"
+일반 대화, 인사, 감사 등은 "일반대화"
+
+답변: """
+
+    try:
+        response = await llm.ainvoke(prompt)
+        content = response.content.strip()
+
+        if "농업검색" in content:
+            route: RouteType = "document_search"
+            reasoning = "농업 전문 지식 필요"
+        else:
+            route = "general_chat"
+            reasoning = "일반 대화"
+
+        return RoutingResult(route=route, reasoning=reasoning)
+
+    except Exception as e:
+        return RoutingResult(route="document_search", reasoning=f"라우팅 오류: {str(e)}")
+
+
+async def route_query(query: str, query_vec: Optional[np.ndarray] = None) -> RoutingResult:
+    """쿼리 임베딩으로 로컬 라우팅하고, 라우터가 없거나 신뢰도가 낮을 때만 LLM을 호출합니다."""
+    router = await embedding_router.aget()
+    if router is not None and query_vec is not None:
+        route, confidence = router.predict(query_vec)
+        if confidence >= ROUTER_CONFIDENCE:
+            return RoutingResult(route=route, reasoning=f"임베딩 라우터 (신뢰도 {confidence:.2f})")
+
+    return await route_query_llm(query)
@@ -1,32 +1,78 @@
-from typing import List, Dict
-from sentence_transformers import SentenceTransformer
-from sklearn.preprocessing import normalize
-import faiss
-import json
+from contextlib import contextmanager
+from typing import Iterator, List, Dict, Optional
+import numpy as np
 import os
 
+from .embedding import load_embedder
+from .index import Searcher
+from .lifecycle import LazyResource
+from .registry import IndexRegistry
 
-embedder = SentenceTransformer("dragonkue/snowflake-arctic-embed-l-v2.0-ko")
 
-INDEX_DIR = "C:/Users/dm_ohminchan/Model/operation/Vector/index"
-VECTOR_INDEX_PATH = os.path.join(INDEX_DIR, "vector.index")
-METADATA_PATH = os.path.join(INDEX_DIR, "metadata.json")
+# 임베딩 모델과 인덱스는 처음 사용할 때(또는 앱 시작 시 warm_up_all) 로드
+embedder = LazyResource("embedder", load_embedder)
 
-faiss_index = faiss.read_index(VECTOR_INDEX_PATH)
-with open(METADATA_PATH, "r", encoding="utf-8") as f:
-    metadata = json.load(f)
+# 인덱스 경로는 환경변수로 지정 (기본값: 저장소 내 operation/Vector/index)
+INDEX_DIR = os.getenv(
+    "VECTOR_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Vector", "index")
+)
 
-def vector_search(query: str, top_k: int = 15) -> List[Dict]:
-    query_vec = embedder.encode([query])
-    query_vec = normalize(query_vec, axis=1).astype("float32")
-    D, I = faiss_index.search(query_vec, top_k)
+# MinIO 버전 레지스트리 (INDEX_POLL_INTERVAL 초마다 latest.json 확인, 0이면 수동 교체만)
+registry = IndexRegistry(
+    cache_dir=INDEX_DIR,
+    bucket=os.getenv("INDEX_REGISTRY_BUCKET", "vector"),
+    prefix=os.getenv("INDEX_REGISTRY_PREFIX", "index/faiss/"),
+    poll_interval=float(os.getenv("INDEX_POLL_INTERVAL", "0"))
+)
+initial_index = LazyResource("index", lambda: registry.load_initial(INDEX_DIR))
 
-    results = []
-    for i, score in zip(I[0], D[0]):
-        if i < len(metadata):
-            results.append({
-                **metadata[i],
-                "text": metadata[i].get("text", ""),
-                "similarity": float(1 - score)  # L2 → Cosine 유사도로 변환
-            })
-    return results
+
+def current_searcher() -> Searcher:
+    initial_index.get()
+    return registry.current
+
+async def acurrent_searcher() -> Searcher:
+    await initial_index.aget()
+    return registry.current
+
+@contextmanager
+def leased_searcher() -> Iterator[Searcher]:
+    """검색하는 동안 현재 버전을 잡아 교체/정리되더라도 닫히지 않게 합니다."""
+    initial_index.get()
+    with registry.lease() as searcher:
+        yield searcher
+
+def with_searcher(searcher: Searcher, func, *args, **kwargs):
+    """executor 스레드에서 실행: 호출하는 동안 searcher를 잡아 요청이 먼저 취소되어도 사용 중에 닫히지 않게 합니다."""
+    with searcher.in_use():
+        return func(*args, **kwargs)
+
+def embed_query(query: str) -> np.ndarray:
+    return embed_queries([query])
+
+def embed_queries(queries: List[str]) -> np.ndarray:
+    return embedder.get().encode(queries, batch_size=len(queries), normalize_embeddings=True, convert_to_numpy=True).astype("float32")
+
+def vector_search(query: str, top_k: int = 15, query_vec: Optional[np.ndarray] = None,
+                  filters: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+    if query_vec is None:
+        query_vec = embed_query(query)
+    with leased_searcher() as searcher:  # 요청 단위로 한 버전을 잡고 사용
+        return searcher.search(query_vec, top_k, filters)
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict]], top_n: int = 12, k: int = 60) -> List[Dict]:
+    """
+    여러 검색 결과(벡터 / BM25)를 순위만으로 합칩니다: score = Σ 1 / (k + rank).
+    점수 스케일이 다른 검색기끼리도 정규화 없이 합칠 수 있고, 같은 chunk는 ID로 묶습니다.
+    """
+    fused: Dict[int, Dict] = {}
+    scores: Dict[int, float] = {}
+    for results in result_lists:
+        for rank, record in enumerate(results, start=1):
+            chunk_id = record["id"]
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+            fused[chunk_id] = {**fused.get(chunk_id, {}), **record}
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_n]
+    return [{**fused[chunk_id], "rrf_score": scores[chunk_id]} for chunk_id in ranked]
@@ -0,0 +1,115 @@
+import hashlib
+import threading
+import time
+import faiss
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+def references_signature(references: List[Dict[str, Any]]) -> str:
+    """검색된 references 구성(문서 + 본문)이 같은지 비교하기 위한 해시."""
+    digest = hashlib.sha1()
+    for ref in references:
+        digest.update(str(ref.get("document")).encode("utf-8"))
+        digest.update(b"\x1f")
+        digest.update(str(ref.get("text")).encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+class SemanticAnswerCache:
+    """
+    의미적으로 거의 같은 질문(쿼리 임베딩 cosine >= threshold)에 같은 references가 검색됐다면
+    이전에 생성한 답변을 그대로 돌려주는 캐시.
+    전용 inner-product 인덱스(IndexIDMap2 + Flat)를 쓰며, 크기 제한을 넘으면 가장 오래 안 쓰인 항목부터 제거합니다.
+    """
+
+    def __init__(self, dim: int = 1024, threshold: float = 0.95, maxsize: int = 5000, ttl: float = 86400):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        self.entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._index_version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self, index_version: str):
+        # 인덱스가 바뀌면 references가 달라지므로 전체 초기화
+        if self._index_version != index_version:
+            self.index.reset()
+            self.entries.clear()
+            self._index_version = index_version
+
+    def _remove(self, entry_ids: List[int]):
+        if entry_ids:
+            self.index.remove_ids(np.array(entry_ids, dtype="int64"))
+            for entry_id in entry_ids:
+                self.entries.pop(entry_id, None)
+
+    def lookup(self, query_vec: np.ndarray, references: List[Dict[str, Any]], index_version: str,
+               k: int = 4) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._check_version(index_version)
+            if self.index.ntotal == 0:
+                self.misses += 1
+                return None
+
+            signature = references_signature(references)
+            now = time.monotonic()
+            scores, ids = self.index.search(np.ascontiguousarray(query_vec, dtype="float32").reshape(1, -1), k)
+
+            expired = []
+            for score, entry_id in zip(scores[0], ids[0]):
+                if entry_id < 0 or score < self.threshold:
+                    break  # 점수 내림차순
+                entry = self.entries.get(int(entry_id))
+                if entry is None:
+                    continue
+                if entry["expires_at"] < now:
+                    expired.append(int(entry_id))
+                    continue
+                if entry["signature"] == signature:
+                    self.entries.move_to_end(int(entry_id))
+                    self._remove(expired)
+                    self.hits += 1
+                    return {**entry, "similarity": float(score)}
+
+            self._remove(expired)
+            self.misses += 1
+            return None
+
+    def store(self, query_vec: np.ndarray, references: List[Dict[str, Any]], index_version: str,
+              query: str, answer: str):
+        with self._lock:
+            self._check_version(index_version)
+            entry_id = self._next_id
+            self._next_id += 1
+
+            self.index.add_with_ids(
+                np.ascontiguousarray(query_vec, dtype="float32").reshape(1, -1),
+                np.array([entry_id], dtype="int64")
+            )
+            self.entries[entry_id] = {
+                "query": query,
+                "answer": answer,
+                "signature": references_signature(references),
+                "expires_at": time.monotonic() + self.ttl,
+            }
+
+            overflow = len(self.entries) - self.maxsize
+            if overflow > 0:
+                self._remove(list(self.entries.keys())[:overflow])
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "threshold": self.threshold,
+        }
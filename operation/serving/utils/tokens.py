@@ -0,0 +1,53 @@
+from transformers import AutoTokenizer
+from typing import List, Tuple
+
+from .lifecycle import LazyResource
+
+tokenizer = LazyResource(
+    "tokenizer", lambda: AutoTokenizer.from_pretrained("unsloth/gemma-3-4b-it", trust_remote_code=True)
+)
+
+# 메시지별 토큰 수는 response_metadata에 저장 → Redis 기록에 함께 직렬화되고 LLM 요청에는 포함되지 않음
+TOKEN_COUNT_KEY = "token_count"
+
+
+def message_tokens(message) -> int:
+    """메시지 토큰 수. 저장된 값이 있으면 재사용하고, 없으면 한 번만 인코딩해 메시지에 기록합니다."""
+    metadata = getattr(message, "response_metadata", None)
+    if metadata is not None and TOKEN_COUNT_KEY in metadata:
+        return metadata[TOKEN_COUNT_KEY]
+
+    content = message.content if hasattr(message, 'content') else str(message)
+    count = len(tokenizer.get().encode(content))
+    if metadata is not None:
+        metadata[TOKEN_COUNT_KEY] = count
+    return count
+
+
+def with_token_count(message):
+    message_tokens(message)
+    return message
+
+
+def count_tokens(messages: List) -> int:
+    return sum(message_tokens(message) for message in messages)
+
+
+def trim_history(previous_messages: List, current_messages: List, max_tokens: int = 2500) -> Tuple[List, int]:
+    """
+    토큰 합계가 max_tokens 이하가 될 때까지 오래된 대화 쌍(질문+답변)부터 제외합니다.
+    메시지별 토큰 수를 한 번씩만 더하고 빼는 선형 패스입니다.
+    """
+    counts = [message_tokens(message) for message in previous_messages]
+    total = sum(counts) + count_tokens(current_messages)
+    print(f"DEBUG: 초기 토큰 수: {total}")
+
+    start = 0
+    while total > max_tokens and start < len(previous_messages):
+        step = 2 if len(previous_messages) - start >= 2 else 1
+        total -= sum(counts[start:start + step])
+        start += step
+        print(f"대화 쌍 삭제, 현재 토큰: {total}")
+
+    print(f"DEBUG: 최종 토큰 수: {total}")
+    return previous_messages[start:] + current_messages, total
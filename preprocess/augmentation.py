@@ -13,10 +13,13 @@ def main():
     # 저장 경로 구성
     output_dir = "/data/instruction/"
     os.makedirs(output_dir, exist_ok=True)  # 경로 없을 경우 생성
-    output_file = os.path.join(output_dir, f"generation_QA_set_{today_str}.json")
+    # JSONL로 이어 쓰며, 같은 파일로 다시 실행하면 완료된 작업은 건너뜀 (QA_OUTPUT_FILE로 이전 실행 이어가기)
+    output_file = os.getenv("QA_OUTPUT_FILE") or os.path.join(output_dir, f"generation_QA_set_{today_str}.jsonl")
 
     # 실행
-    result = run_minio_qa_pipeline_v2(storage, prefix="data/", group_size=1, output_file=output_file)
+    # 생성 결과 캐시는 날짜와 무관하게 유지 → 내용이 바뀌지 않은 chunk는 재생성하지 않음 (QA_CACHE_DIR=""이면 캐시 사용 안 함)
+    cache_dir = os.getenv("QA_CACHE_DIR", os.path.join(output_dir, ".qa_cache"))
+    result = run_minio_qa_pipeline_v2(storage, prefix="data/", group_size=1, output_file=output_file, cache_dir=cache_dir)
     return result
 
 if __name__ == "__main__":
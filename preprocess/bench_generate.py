@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    """
+    /v1/chat/completions 흉내: latency만큼 지연 후 QA JSON 객체를 돌려주고,
+    분당 요청 한도(rpm)를 넘으면 429 + retry-after, 정상 응답에는 x-ratelimit-* 헤더를 붙입니다.
+    """
+    latency = 0.5
+    rpm = 600
+    window = deque()
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        now = time.monotonic()
+        with self.lock:
+            while self.window and self.window[0] < now - 60:
+                self.window.popleft()
+            if len(self.window) >= self.rpm:
+                retry_after = self.window[0] + 60 - now
+                self._send(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                           {"retry-after": f"{retry_after:.3f}"})
+                return
+            self.window.append(now)
+            remaining = self.rpm - len(self.window)
+
+        time.sleep(self.latency)
+        content = ",\n".join(
+            json.dumps({"QUESTION": f"질문 {i}", "ANSWER": "농업 전문가로서 상세히 답변드리겠습니다. " * 20}, ensure_ascii=False)
+            for i in range(5)
+        )
+        self._send(200, {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 100, "total_tokens": 200},
+        }, {
+            "x-ratelimit-limit-requests": str(self.rpm),
+            "x-ratelimit-remaining-requests": str(remaining),
+            "x-ratelimit-reset-requests": f"{60 / self.rpm:.3f}s",
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 mock OpenAI 서버로 동시성별 QA 생성 처리량 측정")
+    parser.add_argument("--concurrency", default="1,4,8,16")
+    parser.add_argument("--jobs", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.5, help="mock 응답 지연(초)")
+    parser.add_argument("--rpm", type=int, default=6000, help="mock 서버 분당 요청 한도")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    MockOpenAIHandler.latency = args.latency
+    MockOpenAIHandler.rpm = args.rpm
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), MockOpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # utils.generate는 import 시점에 OpenAI 클라이언트를 만들기 때문에 환경변수를 먼저 지정
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-mock")
+    from utils.generate import build_qa_jobs, generate_qa_concurrently
+    from utils.ratelimit import RateLimiter
+
+    docs = [{"content": "사과 탄저병 방제 방법", "source": f"mock/{i}.json", "titles": [f"문서 {i}"]} for i in range(args.jobs)]
+    jobs = list(build_qa_jobs(docs, perspectives=[("기초지식", "기본")], total_questions=5, batch_size=5))
+
+    print(f"{'동시성':>6} {'jobs':>6} {'초':>8} {'jobs/sec':>9} {'QA':>6}")
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        MockOpenAIHandler.window.clear()
+        limiter = RateLimiter(requests_per_minute=args.rpm, tokens_per_minute=10 ** 9)
+        start = time.perf_counter()
+        qa_count = sum(len(qa or []) for _, qa in generate_qa_concurrently(jobs, model="mock", concurrency=concurrency, limiter=limiter))
+        elapsed = time.perf_counter() - start
+        print(f"{concurrency:>6} {len(jobs):>6} {elapsed:>8.2f} {len(jobs) / elapsed:>9.2f} {qa_count:>6}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,68 @@
-from utils.merge import convert_to_dataset, load_datasets
+import argparse
+import glob
+import os
+import time
+from utils.parquet import iter_records, partition_date, partition_object_name
 from utils.storage import StorageManager
 
 def main():
-    file_path = "C:/Users/dm_ohminchan/Model/data/instrcution"
-    data = load_datasets(file_path)
-    dataset = convert_to_dataset(data)
+    parser = argparse.ArgumentParser(description="생성된 QA 파일을 날짜 파티션별 Parquet으로 변환해 MinIO에 업로드")
+    parser.add_argument("--source-dir", default="C:/Users/dm_ohminchan/Model/data/instrcution")
+    parser.add_argument("--pattern", default="generation_QA_set_*.json*")
+    parser.add_argument("--prefix", default="data/0.0.1v/agriculture.trainset")
+    parser.add_argument("--row-group-size", type=int, default=50000)
+    parser.add_argument("--part-size-mb", type=int, default=16)
+    parser.add_argument("--overwrite", action="store_true", help="이미 업로드된 날짜 파티션도 다시 변환")
+    parser.add_argument("--settle-seconds", type=int, default=600,
+                        help="최근 이 시간(초) 안에 수정된 파일은 아직 생성 중으로 보고 건너뜀")
+    args = parser.parse_args()
 
     manager = StorageManager(bucket="instruction")
-    success = manager.upload_dataset(
-        object_name="data/0.0.1v/agriculture.trainset.parquet",
-        dataset=dataset
+
+    # 생성 파일 하나 = 날짜 파티션 안의 part 하나 ({prefix}/date=YYYYMMDD/part-{파일명}.parquet)
+    # part에는 변환한 원본 파일의 크기/수정 시각을 메타데이터로 기록하고,
+    # 원본이 그대로인 part는 건너뛰며 이어서 생성되어 바뀐 파일만 다시 변환함
+    files = sorted(
+        path for path in glob.glob(os.path.join(args.source_dir, args.pattern))
+        if path.endswith((".json", ".jsonl"))
     )
-    return success
+    uploaded = 0
+    for file_path in files:
+        object_name = partition_object_name(args.prefix, file_path)
+        if object_name is None:
+            print(f"날짜를 알 수 없어 건너뜀: {file_path}")
+            continue
+
+        stat = os.stat(file_path)
+        if time.time() - stat.st_mtime < args.settle_seconds:
+            print(f"생성 중인 파일로 보고 건너뜀 (최근 수정): {file_path}")
+            continue
+
+        source = {"source-size": str(stat.st_size), "source-mtime": str(int(stat.st_mtime))}
+        uploaded_source = manager.object_metadata(object_name)
+        if not args.overwrite and uploaded_source is not None:
+            if {key: uploaded_source.get(key) for key in source} == source:
+                print(f"이미 업로드된 part: {object_name}")
+                continue
+            print(f"원본이 바뀐 part 다시 변환: {object_name}")
+
+        manager.upload_parquet_stream(
+            object_name=object_name,
+            records=iter_records(file_path),
+            row_group_size=args.row_group_size,
+            part_size=args.part_size_mb * 1024 * 1024,
+            metadata=source
+        )
+        uploaded += 1
+
+        # 파일명 기반 part 이전의 part-0.parquet는 같은 원본에서 만든 것이므로 중복되지 않게 제거
+        legacy_part = f"{args.prefix}/date={partition_date(file_path)}/part-0.parquet"
+        if manager.exists(legacy_part):
+            manager.delete(legacy_part)
+            print(f"이전 형식 part 제거: {legacy_part}")
+
+    print(f"part {uploaded}개 업로드 완료.")
+    return uploaded
 
 if __name__ == "__main__":
-    print(main())
\ No newline at end of file
+    print(main())
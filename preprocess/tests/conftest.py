@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 전처리 스크립트는 preprocess를 루트로 실행되므로(utils.* import) 테스트도 같은 경로에서 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# generate.py는 import 시점에 OpenAI 클라이언트를 만들므로 키가 없으면 더미 값을 사용 (테스트는 API를 호출하지 않음)
+os.environ.setdefault("OPENAI_API_KEY", "test")
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from utils.checkpoint import CheckpointedWriter
+from utils.dedup import MinHashDeduplicator
+
+
+def job(batch: int = 0):
+    return {"doc": {"source": "a.json", "titles": ["제목"]}, "perspective": "기초지식", "batch": batch}
+
+
+def qa(question: str):
+    return {"QUESTION": question, "ANSWER": "답변", "source": "a.json", "perspective": "기초지식"}
+
+
+def test_restart_truncates_partial_output_and_ledger(tmp_path):
+    output = tmp_path / "qa.jsonl"
+    with CheckpointedWriter(str(output)) as writer:
+        writer.write(job(0), "k0", [qa("토마토 재배 적온은?")])
+    committed = output.stat().st_size
+
+    # 다음 작업의 QA가 일부만 쓰이고 ledger 줄도 기록 도중 중단된 상황
+    with open(output, "ab") as f:
+        f.write(json.dumps(qa("중단된 질문"), ensure_ascii=False).encode("utf-8")[:10])
+    with open(f"{output}.progress", "a", encoding="utf-8") as f:
+        f.write('{"key": "k1", "cou')
+
+    with CheckpointedWriter(str(output)) as writer:
+        assert writer.completed == {"k0"}
+        assert writer.qa_count == 1
+        assert output.stat().st_size == committed
+        writer.write(job(1), "k1", [qa("오이 수확 시기는?")])
+
+    with open(f"{output}.progress", encoding="utf-8") as f:
+        assert [json.loads(line)["key"] for line in f] == ["k0", "k1"]
+    with open(output, encoding="utf-8") as f:
+        assert [json.loads(line)["QUESTION"] for line in f] == ["토마토 재배 적온은?", "오이 수확 시기는?"]
+
+
+def test_output_without_ledger_is_not_deleted(tmp_path):
+    output = tmp_path / "qa.jsonl"
+    output.write_text(json.dumps(qa("기존 질문"), ensure_ascii=False) + "\n", encoding="utf-8")
+    before = output.read_bytes()
+
+    with pytest.raises(RuntimeError):
+        CheckpointedWriter(str(output))
+    assert output.read_bytes() == before
+
+
+def test_dropped_rows_are_recorded(tmp_path):
+    output = tmp_path / "qa.jsonl"
+    with CheckpointedWriter(str(output)) as writer:
+        writer.write(job(0), "k0", [qa("질문 1")], dropped=[qa("질문 1 ")])
+
+    with CheckpointedWriter(str(output)) as writer:
+        assert writer.dropped_count == 1
+    with open(f"{output}.dropped", encoding="utf-8") as f:
+        assert json.loads(f.readline())["key"] == "k0"
+
+
+def test_iter_written_reseeds_dedup_filter(tmp_path):
+    output = tmp_path / "qa.jsonl"
+    with CheckpointedWriter(str(output)) as writer:
+        writer.write(job(0), "k0", [qa("토마토 재배에 알맞은 온도는 몇 도인가요?")])
+
+    deduper = MinHashDeduplicator(threshold=0.7)
+    with CheckpointedWriter(str(output)) as writer:
+        for row in writer.iter_written():  # run_minio_qa_pipeline_v2가 이어서 실행할 때와 같은 순서
+            deduper.add(row["QUESTION"])
+
+    assert not deduper.add("토마토 재배에 알맞은 온도는 몇 도인가요")
+    assert deduper.add("오이 수확은 언제 하나요?")
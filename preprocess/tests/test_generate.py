@@ -0,0 +1,28 @@
+from utils import generate
+from utils.qa_cache import QACache
+
+
+def job():
+    return {
+        "doc": {"source": "a.json", "titles": ["제목"], "content": "토마토 재배 문서"},
+        "perspective": "기초지식", "perspective_desc": "기본 원리", "batch": 0, "num_questions": 2,
+    }
+
+
+def test_unparseable_reply_is_retried_not_recorded(monkeypatch, tmp_path):
+    monkeypatch.setattr(generate, "generate_enhanced_qa", lambda *args, **kwargs: "JSON이 아닌 응답")
+    cache = QACache(str(tmp_path))
+
+    assert generate.run_qa_job(job(), cache=cache) is None
+    assert not list(tmp_path.iterdir())  # 실패한 응답은 캐시에도 남기지 않음
+
+
+def test_parsed_reply_is_stamped_and_cached(monkeypatch, tmp_path):
+    reply = '{"QUESTION": "질문", "ANSWER": "답변"},'
+    monkeypatch.setattr(generate, "generate_enhanced_qa", lambda *args, **kwargs: reply)
+    cache = QACache(str(tmp_path))
+
+    batch_qa = generate.run_qa_job(job(), cache=cache)
+    assert batch_qa == [{"QUESTION": "질문", "ANSWER": "답변", "source": "a.json", "perspective": "기초지식"}]
+    assert generate.run_qa_job(job(), cache=cache) == batch_qa
+    assert cache.hits == 1
@@ -0,0 +1,34 @@
+import json
+
+import pyarrow.parquet as pq
+
+from utils.parquet import iter_records, partition_object_name, write_parquet_stream
+
+PREFIX = "data/0.0.1v/agriculture.trainset"
+
+
+def test_json_and_jsonl_of_same_day_map_to_different_parts():
+    legacy = partition_object_name(PREFIX, "/data/generation_QA_set_20250101.json")
+    current = partition_object_name(PREFIX, "/data/generation_QA_set_20250101.jsonl")
+    assert legacy != current
+    assert legacy.startswith(f"{PREFIX}/date=20250101/")
+    assert current.startswith(f"{PREFIX}/date=20250101/")
+    assert partition_object_name(PREFIX, "/data/notes.jsonl") is None
+
+
+def test_json_array_and_jsonl_stream_to_parquet(tmp_path):
+    rows = [{"QUESTION": f"질문 {i}", "ANSWER": "답변", "source": "a.json", "perspective": "기초지식"} for i in range(5)]
+    array_file = tmp_path / "generation_QA_set_20250101.json"
+    array_file.write_text("\ufeff" + json.dumps(rows, ensure_ascii=False), encoding="utf-8")
+    lines_file = tmp_path / "generation_QA_set_20250101.jsonl"
+    lines_file.write_text("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows), encoding="utf-8")
+
+    assert list(iter_records(str(lines_file))) == rows
+    assert list(iter_records(str(array_file))) == rows
+
+    out = tmp_path / "part.parquet"
+    with open(out, "wb") as sink:
+        assert write_parquet_stream(iter_records(str(array_file)), sink, row_group_size=2) == 5
+    table = pq.read_table(out)
+    assert table.num_rows == 5
+    assert pq.ParquetFile(out).num_row_groups == 3
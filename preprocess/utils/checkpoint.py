@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Iterator, List, Optional, Set
+
+
+def job_key(source: str, titles: List[str], perspective: str, batch: int) -> str:
+    """생성 작업 식별자: (source, titles, perspective, batch)의 해시."""
+    raw = json.dumps([source, titles, perspective, batch], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class CheckpointedWriter:
+    """
+    QA 결과를 JSONL로 이어 쓰고, 작업이 끝날 때마다 진행 장부(ledger)에 한 줄씩 기록합니다.
+      {output}                : QA 한 줄에 하나 (append)
+      {output}.progress       : {"key", "source", "titles", "perspective", "batch", "count", "dropped", "offset"}
+      {output}.dropped        : 중복 제거로 저장하지 않은 QA (작업 key와 함께, append)
+    ledger의 offset은 해당 작업까지 쓴 출력 파일 크기입니다. 재시작하면 마지막 offset 뒤의
+    (ledger에 기록되기 전에 중단된) 부분 출력을 잘라내고 완료된 작업은 건너뛰므로 중복/누락 없이 이어집니다.
+    ledger 없이 출력 파일만 있으면 기존 데이터를 지우지 않도록 RuntimeError를 냅니다.
+    메모리에는 완료된 작업 키만 유지합니다.
+    """
+
+    def __init__(self, output_file: str):
+        self.output_file = output_file
+        self.ledger_file = f"{output_file}.progress"
+        self.dropped_file = f"{output_file}.dropped"
+        self.completed: Set[str] = set()
+        self.qa_count = 0
+        self.dropped_count = 0
+
+        offset = 0
+        has_ledger = os.path.exists(self.ledger_file)
+        if not has_ledger and os.path.exists(self.output_file) and os.path.getsize(self.output_file) > 0:
+            # ledger 없이는 어떤 작업이 끝났는지 알 수 없으므로 기존 결과를 건드리지 않고 중단
+            raise RuntimeError(
+                f"{self.output_file}이(가) 이미 있지만 진행 장부({self.ledger_file})가 없습니다. "
+                "다른 출력 경로를 지정하거나 기존 파일을 옮긴 뒤 다시 실행하세요."
+            )
+        if has_ledger:
+            valid = []
+            with open(self.ledger_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # 기록 중 중단된 마지막 줄
+                    valid.append(json.dumps(entry, ensure_ascii=False) + "\n")
+                    self.completed.add(entry["key"])
+                    self.qa_count += entry["count"]
+                    self.dropped_count += entry.get("dropped", 0)
+                    offset = max(offset, entry["offset"])
+            with open(self.ledger_file, "w", encoding="utf-8") as f:
+                f.writelines(valid)
+
+        if has_ledger and os.path.exists(self.output_file) and os.path.getsize(self.output_file) > offset:
+            logging.info(f"미완료 작업의 부분 출력 정리: {os.path.getsize(self.output_file) - offset}바이트")
+            with open(self.output_file, "r+b") as f:
+                f.truncate(offset)
+
+        self._output = open(self.output_file, "ab")
+        self._ledger = open(self.ledger_file, "a", encoding="utf-8")
+        self._dropped = None  # 제거된 QA가 처음 생길 때 생성
+        if self.completed:
+            logging.info(f"이어서 실행: 완료된 작업 {len(self.completed)}개, 기존 QA {self.qa_count}개")
+
+    def is_done(self, key: str) -> bool:
+        return key in self.completed
+
+    def iter_written(self) -> Iterator[Dict]:
+        """이전 실행에서 이미 저장된 QA를 순서대로 읽습니다. (중복 필터 상태 복원용)"""
+        with open(self.output_file, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def write(self, job: Dict, key: str, qa_list: List[Dict], dropped: Optional[List[Dict]] = None):
+        """
+        한 작업의 결과를 출력에 쓰고 flush한 뒤 ledger에 완료를 기록합니다.
+        dropped(중복 제거된 QA)는 .dropped 파일에 남기고 ledger에는 개수를 기록합니다.
+        (ledger 기록 전에 중단되면 재실행 시 같은 작업의 dropped 줄이 한 번 더 쓰일 수 있음)
+        """
+        dropped = dropped or []
+        if dropped:
+            if self._dropped is None:
+                self._dropped = open(self.dropped_file, "a", encoding="utf-8")
+            for qa in dropped:
+                self._dropped.write(json.dumps({"key": key, **qa}, ensure_ascii=False) + "\n")
+            self._dropped.flush()
+
+        for qa in qa_list:
+            self._output.write((json.dumps(qa, ensure_ascii=False) + "\n").encode("utf-8"))
+        self._output.flush()
+        os.fsync(self._output.fileno())
+
+        self._ledger.write(json.dumps({
+            "key": key,
+            "source": job["doc"]["source"],
+            "titles": job["doc"]["titles"],
+            "perspective": job["perspective"],
+            "batch": job["batch"],
+            "count": len(qa_list),
+            "dropped": len(dropped),
+            "offset": self._output.tell()
+        }, ensure_ascii=False) + "\n")
+        self._ledger.flush()
+
+        self.completed.add(key)
+        self.qa_count += len(qa_list)
+        self.dropped_count += len(dropped)
+
+    def close(self):
+        self._output.close()
+        self._ledger.close()
+        if self._dropped is not None:
+            self._dropped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
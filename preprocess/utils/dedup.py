@@ -0,0 +1,76 @@
+import hashlib
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_question(text: str) -> str:
+    """공백/문장부호/대소문자 차이를 무시하도록 정규화합니다."""
+    return _NON_WORD.sub("", unicodedata.normalize("NFKC", text).lower())
+
+
+class MinHashDeduplicator:
+    """
+    QUESTION 텍스트의 스트리밍 근접 중복 필터 (MinHash + LSH).
+    글자 n-gram 집합의 MinHash 서명을 bands개 구간으로 나눠 버킷에 넣고,
+    같은 버킷에 걸린 기존 질문과의 추정 Jaccard 유사도가 threshold 이상이면 중복으로 봅니다.
+    질문마다 서명(num_perm개 uint32)과 버킷 키만 보관하므로 원문을 메모리에 유지하지 않습니다.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 32, threshold: float = 0.7, ngram: int = 3, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm은 bands의 배수여야 합니다.")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.ngram = ngram
+
+        rng = np.random.RandomState(seed)
+        # (a * h + b) mod p 순열. a, b < 2^31, h < 2^32 이므로 uint64에서 넘치지 않음
+        self._a = rng.randint(1, 1 << 31, size=num_perm).astype("uint64")
+        self._b = rng.randint(0, 1 << 31, size=num_perm).astype("uint64")
+
+        self.buckets: List[Dict[bytes, List[int]]] = [defaultdict(list) for _ in range(bands)]
+        self.signatures: List[np.ndarray] = []
+        self.seen = 0
+        self.dropped = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        text = normalize_question(text)
+        if len(text) <= self.ngram:
+            shingles = {text}
+        else:
+            shingles = {text[i:i + self.ngram] for i in range(len(text) - self.ngram + 1)}
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "big") for s in shingles],
+            dtype="uint64"
+        )
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return permuted.min(axis=0).astype("uint32")
+
+    def add(self, text: str) -> bool:
+        """새 질문이면 색인에 추가하고 True, 기존 질문과 근접 중복이면 False."""
+        self.seen += 1
+        signature = self.signature(text)
+        keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+        candidates = set()
+        for band, key in enumerate(keys):
+            candidates.update(self.buckets[band].get(key, ()))
+        for candidate in candidates:
+            if np.mean(self.signatures[candidate] == signature) >= self.threshold:
+                self.dropped += 1
+                return False
+
+        item = len(self.signatures)
+        self.signatures.append(signature)
+        for band, key in enumerate(keys):
+            self.buckets[band][key].append(item)
+        return True
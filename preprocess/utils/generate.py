@@ -3,8 +3,16 @@ import logging
 import os
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 
+from .ratelimit import RateLimiter, call_with_backoff
+from .checkpoint import CheckpointedWriter, job_key
+from .dedup import MinHashDeduplicator
+from .qa_cache import QACache, content_key
+
 # 기본 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -14,12 +22,46 @@ logging.basicConfig(
 # OpenAI 키 설정
 load_dotenv()
 os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
-client = OpenAI()
-
-
-def generate_enhanced_qa(context, domain="농업", model="gpt-4.1-nano-2025-04-14", num_questions=25):
-    """개선된 조건으로 고품질 QA 생성"""
-    prompt_template = f"""
+# 재시도는 call_with_backoff가 속도 제한 버킷과 함께 처리하므로 SDK 자체 재시도는 끔
+client = OpenAI(max_retries=0)
+
+# 동시 생성 워커 수와 초기 속도 한도 (실제 한도는 응답의 x-ratelimit-* 헤더로 갱신)
+QA_CONCURRENCY = int(os.getenv("QA_CONCURRENCY", "8"))
+QA_RPM = float(os.getenv("QA_RPM", "500"))
+QA_TPM = float(os.getenv("QA_TPM", "200000"))
+default_limiter = RateLimiter(QA_RPM, QA_TPM)
+
+DEFAULT_MODEL = "gpt-4.1-nano-2025-04-14"
+# build_qa_prompt / 관점 문구를 바꾸면 올려야 이전 캐시 결과가 재사용되지 않음
+PROMPT_VERSION = "v2"
+
+# 생성 결과 캐시 위치 (QA_CACHE_DIR이 비어 있으면 캐시 사용 안 함)
+QA_CACHE_DIR = os.getenv("QA_CACHE_DIR", ".qa_cache")
+# QUESTION 근접 중복 판정 기준 (추정 Jaccard, 0이면 필터 사용 안 함)
+QA_DEDUP_THRESHOLD = float(os.getenv("QA_DEDUP_THRESHOLD", "0.7"))
+
+PERSPECTIVES = [
+    ("기초지식", "기본적인 농업 기술과 원리"),
+    ("실무응용", "현장에서 직접 적용하는 방법"),
+    ("문제해결", "문제 상황 발생 시 대처법"),
+    ("비교분석", "다른 방법과의 비교 및 장단점"),
+    ("친환경농법", "유기농/저투입 기술 중심 관점"),
+]
+
+# 답변 700자 이상 조건 기준 질문 하나당 출력 토큰 추정치 (토큰 버킷 차감용)
+ESTIMATED_TOKENS_PER_QA = 900
+# 프롬프트 글자 수 → 토큰 수 환산 비율. 한글은 GPT 토크나이저에서 대략 글자당 1토큰 안팎이라
+# 기본값 1.0으로 약간 넉넉하게 잡음 (실제 사용량은 응답 헤더로 버킷이 다시 맞춰짐)
+QA_CHARS_PER_TOKEN = float(os.getenv("QA_CHARS_PER_TOKEN", "1.0"))
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 글자 수로 프롬프트 토큰 수를 추정합니다."""
+    return int(len(text) / QA_CHARS_PER_TOKEN) + 1
+
+
+def build_qa_prompt(context, domain="농업", num_questions=25):
+    return f"""
 다음은 한국어로 작성된 전문 농업 기술 문서의 일부입니다. 이 문서를 바탕으로 질문을 생성하세요.
 ---------------------
 {context}
@@ -52,8 +94,17 @@ def generate_enhanced_qa(context, domain="농업", model="gpt-4.1-nano-2025-04-1
 {{"QUESTION": "...", "ANSWER": "..."}}, ...
 """
 
+
+def generate_enhanced_qa(context, domain="농업", model=DEFAULT_MODEL, num_questions=25, limiter=None):
+    """개선된 조건으로 고품질 QA 생성 (limiter가 있으면 속도 제한 + 429 백오프 적용)"""
+    prompt_template = build_qa_prompt(context, domain, num_questions)
+    limiter = limiter or default_limiter
+
     try:
-        response = client.chat.completions.create(
+        response = call_with_backoff(
+            client.chat.completions.with_raw_response.create,
+            limiter,
+            estimated_tokens=estimate_tokens(prompt_template) + num_questions * ESTIMATED_TOKENS_PER_QA,
             model=model,
             messages=[{"role": "user", "content": prompt_template}],
             temperature=0.7,
@@ -79,10 +130,11 @@ def custom_json_parser_safe(response):
         return []
 
 
-def generate_templates_batch(context, domain, model="gpt-4.1-nano-2025-04-14",
-                             total_questions=1000, batch_size=25):
-    """배치 방식으로 QA 생성"""
+def generate_templates_batch(context, domain, model=DEFAULT_MODEL,
+                             total_questions=1000, batch_size=25, limiter=None):
+    """배치 방식으로 QA 생성 (순차 실행, 호출 간격은 limiter가 조절)"""
     all_questions = []
+    limiter = limiter or default_limiter
 
     for i in range(0, total_questions, batch_size):
         remaining = min(batch_size, total_questions - i)
@@ -91,7 +143,7 @@ def generate_templates_batch(context, domain, model="gpt-4.1-nano-2025-04-14",
 
         logging.info(f"배치 {batch_num}/{total_batches}: {remaining}개 질문 생성 중...")
 
-        batch_result = generate_enhanced_qa(context, domain, model, remaining)
+        batch_result = generate_enhanced_qa(context, domain, model, remaining, limiter)
 
         if batch_result:
             parsed_batch = custom_json_parser_safe(batch_result)
@@ -100,16 +152,11 @@ def generate_templates_batch(context, domain, model="gpt-4.1-nano-2025-04-14",
         else:
             logging.warning(f"배치 {batch_num} 생성 실패")
 
-        if batch_num < total_batches:
-            time.sleep(5)
-
     return all_questions
 
 
-def group_titles_for_qa(documents, group_size=3):
-    """MinIO 문서들을 title별로 그룹화"""
-    grouped_docs = []
-
+def group_titles_for_qa(documents, group_size=3) -> Iterator[Dict]:
+    """MinIO 문서들을 title별로 그룹화 (문서를 받는 대로 그룹을 하나씩 내보냄)"""
     for doc in documents:
         content = doc.get("content", [])
         title_data = {}
@@ -124,68 +171,151 @@ def group_titles_for_qa(documents, group_size=3):
         for i in range(0, len(titles), group_size):
             group_titles = titles[i:i + group_size]
             merged_content = "\n\n".join([f"## {title}\n{title_data[title]}" for title in group_titles])
-            grouped_docs.append({
+            yield {
                 "content": merged_content,
                 "source": doc['key'],
                 "titles": group_titles
-            })
-
-    return grouped_docs
-
+            }
 
-def run_minio_qa_pipeline_v2(storage_manager, prefix="", group_size=3, output_file="qa_result.json"):
-    """관점 확장 + 배치 기반 QA 생성 파이프라인"""
-    documents = storage_manager.download(prefix=prefix, extensions=".json")
-    logging.info(f"문서 {len(documents)}개 다운로드")
-
-    grouped_docs = group_titles_for_qa(documents, group_size)
-    logging.info(f"그룹 {len(grouped_docs)}개 생성")
-
-    perspectives = [
-        ("기초지식", "기본적인 농업 기술과 원리"),
-        ("실무응용", "현장에서 직접 적용하는 방법"),
-        ("문제해결", "문제 상황 발생 시 대처법"),
-        ("비교분석", "다른 방법과의 비교 및 장단점"),
-        ("친환경농법", "유기농/저투입 기술 중심 관점"),
-    ]
-
-    all_qa = []
-    for i, doc in enumerate(grouped_docs, 1):
-        logging.info(f"[{i}/{len(grouped_docs)}] 그룹 QA 증강 시작: {doc['titles']}")
 
+def build_qa_jobs(grouped_docs, perspectives=PERSPECTIVES, total_questions=40, batch_size=5) -> Iterator[Dict]:
+    """(문서 그룹 × 관점 × 배치) 단위의 독립적인 생성 작업을 하나씩 내보냅니다."""
+    for doc in grouped_docs:
         for perspective_name, perspective_desc in perspectives:
-            enhanced_context = f"""
-            관점: {perspective_name} - {perspective_desc}
+            for batch, offset in enumerate(range(0, total_questions, batch_size), 1):
+                yield {
+                    "doc": doc,
+                    "perspective": perspective_name,
+                    "perspective_desc": perspective_desc,
+                    "batch": batch,
+                    "num_questions": min(batch_size, total_questions - offset),
+                }
+
+
+def qa_job_key(job) -> str:
+    return job_key(job["doc"]["source"], job["doc"]["titles"], job["perspective"], job["batch"])
+
+
+def run_qa_job(job, model=DEFAULT_MODEL, limiter=None, cache=None) -> Optional[List[Dict]]:
+    """
+    작업 하나를 실행합니다. API 호출이 실패하거나 응답에서 QA를 하나도 파싱하지 못하면 None (재실행 시 다시 시도).
+    cache가 있으면 (문서 내용, 관점, 모델, 프롬프트 버전, 배치)가 같은 이전 결과를 API 호출 없이 재사용합니다.
+    """
+    doc = job["doc"]
+    key = content_key(doc["content"], job["perspective"], model, PROMPT_VERSION, job["batch"], job["num_questions"])
+    if cache is not None:
+        batch_qa = cache.get(key)
+        if batch_qa is not None:
+            # 같은 내용이 다른 객체 key로 옮겨졌을 수 있으므로 source는 현재 문서 기준으로 다시 기록
+            return [{**qa, "source": doc["source"], "perspective": job["perspective"]} for qa in batch_qa]
+    enhanced_context = f"""
+            관점: {job['perspective']} - {job['perspective_desc']}
             {doc['content']}
             """
-            batch_qa = generate_templates_batch(
-                context=enhanced_context,
-                domain="농업",
-                model="gpt-4.1-nano-2025-04-14",
-                total_questions=40,
-                batch_size=5
-            )
-
-            for qa in batch_qa:
-                qa["source"] = doc["source"]
-                qa["perspective"] = perspective_name
-
-            all_qa.extend(batch_qa)
-            logging.info(f"  관점 {perspective_name}: {len(batch_qa)}개 생성됨")
-
-            for idx, qa in enumerate(batch_qa[:2], 1):
+    batch_result = generate_enhanced_qa(enhanced_context, "농업", model, job["num_questions"], limiter)
+    if not batch_result:
+        logging.warning(f"생성 실패: {doc['titles']} / {job['perspective']} / 배치 {job['batch']}")
+        return None
+
+    batch_qa = custom_json_parser_safe(batch_result)
+    if not batch_qa:
+        # 빈 결과를 완료로 기록하면 이어서 실행할 때 영영 건너뛰므로 실패로 처리
+        logging.warning(f"QA 파싱 실패: {doc['titles']} / {job['perspective']} / 배치 {job['batch']}")
+        return None
+    for qa in batch_qa:
+        qa["source"] = doc["source"]
+        qa["perspective"] = job["perspective"]
+    if cache is not None:
+        cache.put(key, batch_qa)
+    return batch_qa
+
+
+def generate_qa_concurrently(jobs: Iterable[Dict], model=DEFAULT_MODEL, concurrency=QA_CONCURRENCY,
+                             limiter=None, cache=None) -> Iterator[Tuple[Dict, Optional[List[Dict]]]]:
+    """
+    생성 작업을 스레드풀 워커 concurrency개로 동시에 실행하고 끝나는 순서대로 (job, QA 목록)을 내보냅니다.
+    호출 속도는 모든 워커가 공유하는 RateLimiter(RPM/TPM 토큰 버킷)로 제한되고,
+    429는 retry-after 또는 지수 백오프로 재시도됩니다.
+    jobs는 제너레이터여도 되며, 대기 중인 작업은 concurrency * 2개로 제한해 메모리 사용량이 일정합니다.
+    실패한 작업은 QA 목록 대신 None을 내보냅니다.
+    """
+    limiter = limiter or default_limiter
+
+    def finished(done):
+        for future in done:
+            job = futures.pop(future)
+            try:
+                yield job, future.result()
+            except Exception as e:
+                logging.error(f"작업 실패: {job['doc']['titles']} / {job['perspective']} / 배치 {job['batch']}: {e}")
+                yield job, None
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="qa") as executor:
+        futures = {}
+        for job in jobs:
+            futures[executor.submit(run_qa_job, job, model, limiter, cache)] = job
+            if len(futures) >= concurrency * 2:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                yield from finished(done)
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            yield from finished(done)
+
+
+def run_minio_qa_pipeline_v2(storage_manager, prefix="", group_size=3, output_file="qa_result.jsonl",
+                             concurrency=QA_CONCURRENCY, model=DEFAULT_MODEL,
+                             cache_dir=QA_CACHE_DIR, dedup_threshold=QA_DEDUP_THRESHOLD):
+    """
+    관점 확장 + 배치 기반 QA 생성 파이프라인 (그룹 × 관점 × 배치 작업을 동시에 처리)
+    다운로드 → 그룹화 → 작업 생성 → 생성 → 중복 제거 → 저장이 모두 스트리밍으로 이어지고,
+    결과는 작업이 끝날 때마다 output_file(JSONL)에 추가되며 진행 장부에 기록됩니다.
+    같은 output_file로 다시 실행하면 완료된 작업은 건너뛰고 이어서 생성합니다.
+    내용이 바뀌지 않은 입력은 cache_dir의 이전 결과를 쓰고, 기존 질문과 근접 중복인 QA는 저장하지 않습니다.
+    (작업 완료 순서에 따라 먼저 저장된 쪽이 남으며, 제외된 QA는 {output_file}.dropped에 기록됩니다)
+    """
+    cache = QACache(cache_dir) if cache_dir else None
+    deduper = MinHashDeduplicator(threshold=dedup_threshold) if dedup_threshold > 0 else None
+
+    documents = storage_manager.iter_download(prefix=prefix, extensions=".json", verbose=False)
+    grouped_docs = group_titles_for_qa(documents, group_size)
+
+    start = time.perf_counter()
+    done, failed = 0, 0
+    with CheckpointedWriter(output_file) as writer:
+        if deduper is not None and writer.completed:
+            for qa in writer.iter_written():  # 이어서 실행할 때 기존 질문으로 중복 필터 복원
+                deduper.add(qa["QUESTION"])
+
+        jobs = (job for job in build_qa_jobs(grouped_docs) if not writer.is_done(qa_job_key(job)))
+        for job, batch_qa in generate_qa_concurrently(jobs, model, concurrency, cache=cache):
+            done += 1
+            if batch_qa is None:
+                failed += 1
+                continue
+            dropped = []
+            if deduper is not None:
+                kept = []
+                for qa in batch_qa:
+                    (kept if deduper.add(qa.get("QUESTION", "")) else dropped).append(qa)
+                batch_qa = kept
+            writer.write(job, qa_job_key(job), batch_qa, dropped)
+            logging.info(f"[{done}] {job['doc']['titles']} / {job['perspective']} / 배치 {job['batch']}: {len(batch_qa)}개 생성됨")
+
+            for idx, qa in enumerate(batch_qa[:1], 1):
                 logging.info(f"    ▶ 샘플 QA {idx}")
                 logging.info(f"      Q: {qa['QUESTION']}")
                 logging.info(f"      A: {qa['ANSWER'][:200]}...")
 
-        logging.info(f"→ 그룹 누적: {len(all_qa)}개 QA")
-
-        if i % 10 == 0:
-            logging.info(f"==== 진행 상황 {i}/{len(grouped_docs)} ====")
-            logging.info(f"누적 QA 수: {len(all_qa)}개")
-
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(all_qa, f, ensure_ascii=False, indent=2)
-
-    logging.info(f"\n최종 완료: {len(all_qa)}개 QA 저장됨 → {output_file}")
-    return all_qa
+            if done % 50 == 0:
+                elapsed = time.perf_counter() - start
+                logging.info(f"==== 진행 상황: 작업 {done}개 ({done / elapsed:.2f} jobs/sec), 실패 {failed}개 ====")
+                logging.info(f"누적 QA 수: {writer.qa_count}개")
+                if cache is not None:
+                    logging.info(f"캐시 적중 {cache.hits}개 / 미적중 {cache.misses}개")
+                if deduper is not None:
+                    logging.info(f"근접 중복 제거: {deduper.dropped}/{deduper.seen}개")
+
+    logging.info(f"\n최종 완료: {writer.qa_count}개 QA 저장됨 → {output_file} (실패 작업 {failed}개는 재실행 시 다시 시도)")
+    if writer.dropped_count:
+        logging.info(f"근접 중복으로 제외된 QA {writer.dropped_count}개 → {writer.dropped_file}")
+    return writer.qa_count
@@ -2,12 +2,16 @@ import glob
 import json
 import pandas as pd
 
-def load_datasets(json_dir: str, pattern: str = "*.json"):
+def load_datasets(json_dir: str, pattern: str = "*.json*"):
     data = []
 
     for file_path in glob.glob(f"{json_dir}/{pattern}"):
-        with open(file_path, "r", encoding="utf-8") as f:
-            data.extend(json.load(f))
+        if file_path.endswith(".jsonl"):
+            with open(file_path, "r", encoding="utf-8") as f:
+                data.extend(json.loads(line) for line in f if line.strip())
+        elif file_path.endswith(".json"):
+            with open(file_path, "r", encoding="utf-8") as f:
+                data.extend(json.load(f))
     return data
 
 def convert_to_dataset(data: list):
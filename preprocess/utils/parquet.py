@@ -0,0 +1,109 @@
+import json
+import os
+import re
+from typing import Dict, Iterable, Iterator, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 학습 데이터셋 스키마 (generate.py가 만드는 QA 필드)
+QA_SCHEMA = pa.schema([
+    ("QUESTION", pa.string()),
+    ("ANSWER", pa.string()),
+    ("source", pa.string()),
+    ("perspective", pa.string()),
+])
+
+_DATE_PATTERN = re.compile(r"(\d{8})")
+
+
+def iter_json_array(file_path: str, chunk_size: int = 1 << 20) -> Iterator[Dict]:
+    """
+    최상위가 리스트인 JSON 파일을 chunk_size 단위로 읽으며 원소를 하나씩 내보냅니다.
+    파일 전체를 json.load 하지 않으므로 메모리에는 읽는 중인 구간만 유지됩니다.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, "r", encoding="utf-8") as f:
+        buffer, pos = f.read(chunk_size), 0
+        while True:
+            # 원소 사이의 공백/콤마와 시작 괄호 건너뛰기 (중첩 괄호는 raw_decode가 원소째 소비)
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,[\ufeff":
+                pos += 1
+            if pos == len(buffer):
+                buffer, pos = f.read(chunk_size), 0
+                if not buffer:
+                    return
+                continue
+            if buffer[pos] == "]":
+                return
+
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                more = f.read(chunk_size)
+                if not more:
+                    raise
+                buffer, pos = buffer[pos:] + more, 0  # 원소가 구간 경계에 걸림 → 이어서 읽기
+                continue
+            yield item
+            pos = end
+
+
+def iter_jsonl(file_path: str) -> Iterator[Dict]:
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_records(file_path: str) -> Iterator[Dict]:
+    """JSON(리스트) / JSONL 파일을 확장자에 맞게 스트리밍으로 읽습니다."""
+    if file_path.endswith(".jsonl"):
+        return iter_jsonl(file_path)
+    return iter_json_array(file_path)
+
+
+def partition_date(file_path: str) -> Optional[str]:
+    """generation_QA_set_YYYYMMDD.json(l) 파일명에서 날짜 파티션 값을 꺼냅니다."""
+    match = _DATE_PATTERN.search(os.path.basename(file_path))
+    return match.group(1) if match else None
+
+
+def partition_object_name(prefix: str, file_path: str) -> Optional[str]:
+    """
+    원본 파일 하나 = Parquet 파일 하나: {prefix}/date=YYYYMMDD/part-{파일명}.parquet
+    같은 날짜에 .json(이전 형식)과 .jsonl이 함께 있어도 서로 덮어쓰지 않도록 part 이름을 원본 파일명으로 정합니다.
+    """
+    date = partition_date(file_path)
+    if date is None:
+        return None
+    return f"{prefix}/date={date}/part-{os.path.basename(file_path)}.parquet"
+
+
+def write_parquet_stream(
+    records: Iterable[Dict],
+    sink,
+    schema: pa.Schema = QA_SCHEMA,
+    row_group_size: int = 50000
+) -> int:
+    """
+    레코드를 row_group_size 개씩 모아 RecordBatch로 변환해 Parquet row group 단위로 씁니다.
+    스키마에 없는 필드는 버리고 값은 문자열로 맞추며, 쓴 행 수를 반환합니다.
+    """
+    fields = schema.names
+    rows = 0
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        batch = []
+        for record in records:
+            batch.append({field: None if record.get(field) is None else str(record[field]) for field in fields})
+            if len(batch) >= row_group_size:
+                writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema), row_group_size=row_group_size)
+                rows += len(batch)
+                batch = []
+        if batch:
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema), row_group_size=row_group_size)
+            rows += len(batch)
+    finally:
+        writer.close()
+    return rows
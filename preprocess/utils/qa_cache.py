@@ -0,0 +1,44 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+
+def content_key(context: str, perspective: str, model: str, prompt_version: str, batch: int, num_questions: int) -> str:
+    """생성 입력 내용으로 만든 캐시 키. 문서 내용/관점/모델/프롬프트 버전 중 하나라도 바뀌면 새 키가 됩니다."""
+    raw = json.dumps([context, perspective, model, prompt_version, batch, num_questions], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class QACache:
+    """
+    내용 주소 기반 QA 생성 결과 캐시. 키 하나당 파일 하나({cache_dir}/{key[:2]}/{key}.json)에 저장하며,
+    출력 파일/실행 날짜와 무관하게 유지되어 내용이 바뀌지 않은 chunk는 다시 API를 호출하지 않습니다.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key: str, qa_list: List[Dict]):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(qa_list, f, ensure_ascii=False)
+        os.replace(tmp_path, path)  # 동시 작업/중단 시에도 완성된 파일만 보이도록
@@ -0,0 +1,135 @@
+import logging
+import random
+import re
+import threading
+import time
+from typing import Callable, Mapping, Optional
+
+import openai
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """OpenAI 리셋 헤더("1s", "6m0s", "20ms")나 retry-after("2")를 초 단위로 변환합니다."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _UNIT_SECONDS[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """분당 한도(limit)를 초당 limit/60 으로 채우는 스레드 안전 토큰 버킷."""
+
+    def __init__(self, limit_per_minute: float):
+        self.capacity = float(limit_per_minute)
+        self.rate = self.capacity / 60
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1):
+        amount = min(amount, self.capacity)  # 한도보다 큰 요청이 영원히 대기하지 않도록
+        with self._cond:
+            while True:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                self._cond.wait((amount - self.level) / self.rate)
+
+    def sync(self, limit: Optional[float], remaining: Optional[float], reset: Optional[float]):
+        """
+        응답 헤더의 한도/잔량으로 버킷을 보정합니다.
+        서버가 본 잔량이 더 적으면 그 값으로 낮추고, 리셋까지 남은 시간으로 채워지는 속도를 맞춥니다.
+        """
+        with self._cond:
+            self._refill()
+            if limit:
+                self.capacity = limit
+                self.rate = limit / 60
+            if remaining is not None:
+                self.level = min(self.level, remaining)
+                if reset and limit and remaining < limit:
+                    self.rate = max(self.rate, (limit - remaining) / reset)
+            self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        """429를 받으면 버킷을 비워 모든 워커가 seconds 동안 새 요청을 보내지 않게 합니다."""
+        with self._cond:
+            self._refill()
+            self.level = -seconds * self.rate
+
+
+class RateLimiter:
+    """
+    요청 수(RPM)와 토큰 수(TPM) 두 버킷으로 동시 워커들의 호출 속도를 제한합니다.
+    초기 한도는 추정값이고, 응답의 x-ratelimit-* 헤더를 받을 때마다 실제 한도에 맞춰집니다.
+    """
+
+    def __init__(self, requests_per_minute: float = 500, tokens_per_minute: float = 200000):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def acquire(self, estimated_tokens: int):
+        self.requests.acquire(1)
+        self.tokens.acquire(estimated_tokens)
+
+    def update(self, headers: Mapping[str, str]):
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            bucket.sync(
+                float(limit) if limit else None,
+                float(remaining) if remaining else None,
+                parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            )
+
+    def backoff(self, headers: Optional[Mapping[str, str]], attempt: int,
+                base: float = 1.0, max_delay: float = 60.0) -> float:
+        """429 대기 시간: retry-after 헤더가 있으면 따르고, 없으면 지수 백오프 + 지터."""
+        delay = None
+        if headers is not None:
+            retry_after_ms = headers.get("retry-after-ms")
+            delay = float(retry_after_ms) / 1000 if retry_after_ms else parse_duration(headers.get("retry-after"))
+        if delay is None:
+            delay = min(max_delay, base * 2 ** attempt) * (0.5 + random.random() / 2)
+        self.requests.pause(delay)
+        return delay
+
+
+def call_with_backoff(create: Callable, limiter: RateLimiter, estimated_tokens: int, max_retries: int = 6, **kwargs):
+    """
+    client.chat.completions.with_raw_response.create를 속도 제한 + 429/일시 오류 재시도와 함께 호출하고
+    파싱된 응답을 반환합니다.
+    """
+    for attempt in range(max_retries + 1):
+        limiter.acquire(estimated_tokens)
+        try:
+            raw = create(**kwargs)
+            limiter.update(raw.headers)
+            return raw.parse()
+        except openai.RateLimitError as e:
+            if attempt == max_retries:
+                raise
+            # 버킷을 비워 두므로 다음 acquire에서 delay만큼 대기 (다른 워커도 함께 멈춤)
+            delay = limiter.backoff(e.response.headers, attempt)
+            logging.warning(f"429 속도 제한, {delay:.1f}초 후 재시도 ({attempt + 1}/{max_retries})")
+        except (openai.APIConnectionError, openai.InternalServerError) as e:
+            if attempt == max_retries:
+                raise
+            delay = min(60.0, 2 ** attempt) * (0.5 + random.random() / 2)
+            logging.warning(f"일시 오류({e.__class__.__name__}), {delay:.1f}초 후 재시도 ({attempt + 1}/{max_retries})")
+            time.sleep(delay)
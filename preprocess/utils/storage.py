@@ -1,9 +1,78 @@
 import boto3
 import json
-from typing import List, Dict, Union, Optional
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from typing import List, Dict, Iterable, Iterator, Union, Optional
+from botocore.config import Config
 from botocore.exceptions import BotoCoreError, ClientError
 from io import BytesIO
 
+from .parquet import write_parquet_stream
+
+class MultipartUploadWriter:
+    """
+    쓰기 전용 파일 객체. 쓰인 바이트를 part_size 단위로 모아 S3 multipart upload의 part로 올립니다.
+    메모리에는 올리기 전 part 하나만 유지되고, close()에서 업로드를 완료하며 abort()는 업로드를 취소합니다.
+    (S3/MinIO는 마지막 part를 제외하고 5MB 이상이어야 함)
+    """
+
+    def __init__(self, client, bucket: str, key: str, part_size: int = 16 * 1024 * 1024,
+                 content_type: str = "application/octet-stream", metadata: Optional[Dict[str, str]] = None):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, 5 * 1024 * 1024)
+        self.upload_id = client.create_multipart_upload(
+            Bucket=bucket, Key=key, ContentType=content_type, Metadata=metadata or {}
+        )["UploadId"]
+        self.parts = []
+        self.buffer = bytearray()
+        self.position = 0
+        self.closed = False
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def tell(self) -> int:
+        return self.position
+
+    def write(self, data) -> int:
+        self.buffer += data
+        self.position += len(data)
+        while len(self.buffer) >= self.part_size:
+            self._upload_part(bytes(self.buffer[:self.part_size]))
+            del self.buffer[:self.part_size]
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def _upload_part(self, body: bytes):
+        number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=number, Body=body
+        )
+        self.parts.append({"PartNumber": number, "ETag": response["ETag"]})
+
+    def close(self):
+        if self.closed:
+            return
+        if self.buffer or not self.parts:
+            self._upload_part(bytes(self.buffer))
+            self.buffer = bytearray()
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, MultipartUpload={"Parts": self.parts}
+        )
+        self.closed = True
+
+    def abort(self):
+        if not self.closed:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+            self.closed = True
+
+
 class StorageManager:
     def __init__(
         self,
@@ -17,49 +86,83 @@ class StorageManager:
             "s3",
             endpoint_url=endpoint_url,
             aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key
+            aws_secret_access_key=aws_secret_access_key,
+            config=Config(max_pool_connections=16)  # 병렬 다운로드용 커넥션 풀
         )
 
-    def download(
+    def list_objects(
         self,
         prefix: str = "",
-        extensions: Union[str, List[str]] = ".json",
-        verbose: bool = True
-    ) -> List[Dict]:
+        extensions: Union[str, List[str]] = ".json"
+    ) -> Iterator[Dict]:
+        """list_objects_v2를 페이지 단위로 끝까지 순회합니다. (한 번 호출은 최대 1000개에서 끊김)"""
         if isinstance(extensions, str):
             extensions = [extensions]
 
-        try:
-            response = self.client.list_objects_v2(Bucket=self.bucket, Prefix=prefix)
-            contents = response.get("Contents", [])
-        except (BotoCoreError, ClientError) as e:
-            print(f"목록 불러오기 실패: {e}")
-            return []
-
-        results = []
-        for obj in contents:
-            key = obj["Key"]
-            if not any(key.endswith(ext) for ext in extensions):
-                continue
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                if any(obj["Key"].endswith(ext) for ext in extensions):
+                    yield obj
 
+    def iter_download(
+        self,
+        prefix: str = "",
+        extensions: Union[str, List[str]] = ".json",
+        verbose: bool = True,
+        max_workers: int = 8
+    ) -> Iterator[Dict]:
+        """
+        객체를 스레드풀로 병렬 다운로드하면서 끝나는 순서대로 {"key", "raw", "content"}를 내보냅니다.
+        동시에 대기하는 다운로드는 max_workers * 2개로 제한되어 코퍼스 크기와 무관하게 메모리가 일정합니다.
+        """
+        def fetch(key: str) -> Optional[Dict]:
             if verbose:
                 print(f"Downloading: {key}")
-
             try:
                 s3_obj = self.client.get_object(Bucket=self.bucket, Key=key)
                 raw_data = s3_obj["Body"].read().decode("utf-8")
-                json_data = json.loads(raw_data)
-                results.append({
+                return {
                     "key": key,
                     "raw": raw_data,
-                    "content": json_data
-                })
+                    "content": json.loads(raw_data)
+                }
             except Exception as e:
                 print(f"Failed to load {key}: {e}")
+                return None
+
+        try:
+            keys = (obj["Key"] for obj in self.list_objects(prefix, extensions))
+            count = 0
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="minio") as executor:
+                pending = set()
+                for key in keys:
+                    pending.add(executor.submit(fetch, key))
+                    if len(pending) < max_workers * 2:
+                        continue
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for result in (future.result() for future in done):
+                        if result is not None:
+                            count += 1
+                            yield result
+                for result in (future.result() for future in as_completed(pending)):
+                    if result is not None:
+                        count += 1
+                        yield result
+        except (BotoCoreError, ClientError) as e:
+            print(f"목록 불러오기 실패: {e}")
+            return
 
         if verbose:
-            print(f"총 {len(results)}개 파일 다운로드 완료.")
-        return results
+            print(f"총 {count}개 파일 다운로드 완료.")
+
+    def download(
+        self,
+        prefix: str = "",
+        extensions: Union[str, List[str]] = ".json",
+        verbose: bool = True,
+        max_workers: int = 8
+    ) -> List[Dict]:
+        return list(self.iter_download(prefix, extensions, verbose, max_workers))
 
     def upload_dataset(
             self,
@@ -88,4 +191,47 @@ class StorageManager:
 
         except Exception as e:
             print(f"Dataset 업로드 실패: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def object_metadata(self, object_name: str) -> Optional[Dict[str, str]]:
+        """객체의 사용자 메타데이터를 반환합니다. 객체가 없으면 None."""
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=object_name).get("Metadata", {})
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def exists(self, object_name: str) -> bool:
+        return self.object_metadata(object_name) is not None
+
+    def delete(self, object_name: str):
+        self.client.delete_object(Bucket=self.bucket, Key=object_name)
+
+    def upload_parquet_stream(
+            self,
+            object_name: str,
+            records: Iterable[Dict],
+            row_group_size: int = 50000,
+            part_size: int = 16 * 1024 * 1024,
+            metadata: Optional[Dict[str, str]] = None,
+            verbose: bool = True
+    ) -> int:
+        """
+        레코드를 Parquet row group 단위로 변환하면서 multipart upload로 바로 올립니다.
+        데이터셋 전체를 DataFrame/BytesIO로 만들지 않으므로 메모리는 row group 하나 + part 하나 수준입니다.
+        업로드한 행 수를 반환하며, 실패하면 multipart upload를 취소하고 예외를 다시 올립니다.
+        metadata는 객체의 사용자 메타데이터로 저장됩니다. (원본 파일 크기/수정 시각 등)
+        """
+        sink = MultipartUploadWriter(self.client, self.bucket, object_name, part_size, metadata=metadata)
+        try:
+            rows = write_parquet_stream(records, sink, row_group_size=row_group_size)
+            sink.close()
+        except Exception as e:
+            sink.abort()
+            print(f"Dataset 업로드 실패: {e}")
+            raise
+
+        if verbose:
+            print(f"Dataset 업로드 성공: {object_name} ({rows}행)")
+        return rows